@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-row vs batched event ingest into EventDatabase.
+
+Usage:
+    python benchmarks/bench_database.py [N ...]   (default: 10000 100000)
+"""
+
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import EventDatabase
+
+
+def synthetic_events(n):
+    """Generate n synthetic events with unique URLs."""
+    base = datetime(2026, 1, 1)
+    for i in range(n):
+        yield {
+            'title': f'Evento Sintético {i}',
+            'start_date': (base + timedelta(days=i % 365)).strftime('%Y-%m-%d'),
+            'end_date': None,
+            'location': 'Aveiro',
+            'url': f'https://example.com/evento/{i}',
+            'image_url': None,
+            'source': f'Source {i % 5}',
+            'tags': ['Benchmark'],
+        }
+
+
+def bench_per_row(db, n):
+    started = time.perf_counter()
+    for event in synthetic_events(n):
+        db.upsert_event(event)
+    return time.perf_counter() - started
+
+
+def bench_batch_context(db, n):
+    started = time.perf_counter()
+    with db.batch():
+        for event in synthetic_events(n):
+            db.upsert_event(event)
+    return time.perf_counter() - started
+
+
+def bench_upsert_events(db, n):
+    started = time.perf_counter()
+    db.upsert_events(synthetic_events(n))
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    print(f"{'events':>8}  {'mode':<16} {'seconds':>9} {'events/s':>10}")
+    for n in sizes:
+        for name, bench in (
+            ('per-row', bench_per_row),
+            ('db.batch()', bench_batch_context),
+            ('upsert_events()', bench_upsert_events),
+        ):
+            with tempfile.TemporaryDirectory() as tmp:
+                db = EventDatabase(db_path=Path(tmp) / 'bench.db')
+                elapsed = bench(db, n)
+                db.close()
+            print(f"{n:>8}  {name:<16} {elapsed:>9.3f} {n / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000])
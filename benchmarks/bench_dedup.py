@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cross-source duplicate detection on a synthetic event history.
+
+Builds a history of n events (default 100k) spread over about three years
+and five sources, where a share of the shows is also listed by a second
+source under a variant title ("Título - Companhia", "TÍTULO | Ciclo",
+without accents, ...). Reports, per size:
+
+    find_duplicates     blocked detection (core.dedup) time, comparisons
+                        made and precision/recall against the planted pairs
+    link_duplicates     the same through EventDatabase, including reading
+                        the rows and writing canonical_id: first run and
+                        re-run over the whole history (python main.py
+                        dedup), then the daily run over the upcoming
+                        UPCOMING_DAYS only (main.py passes today)
+    naive pairs         comparisons an all-pairs / same-day-pairs scan
+                        would need, for scale
+
+Usage:
+    python benchmarks/bench_dedup.py [N ...]   (default: 100000)
+"""
+
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import EventDatabase
+from core.dedup import find_duplicates
+
+SOURCES = ['Teatro Aveirense', 'AveiroOn', 'GrETUA', 'Mercado Negro', 'Avenida Café']
+
+# Share of shows also listed by a second source
+DUPLICATE_SHARE = 0.15
+
+DAYS = 3 * 365
+
+# Days still ahead at the end of the history, for the daily link_duplicates run
+UPCOMING_DAYS = 90
+
+WORDS = (
+    'noite luz mar sal ria vento casa corpo voz cidade tempo memória jardim fado jazz '
+    'quarteto sonata dança silêncio viagem terra fogo água lua sol barco canal ponte '
+    'ilha sombra espelho retrato palavra poema canção orquestra coro ensemble trio '
+    'solo duo ciclo mostra sessão oficina leitura conversa estreia gala baile'
+).split()
+GENRES = ['Concerto', 'Teatro', 'Dança', 'Cinema', 'Festival', 'Exposição']
+SUBTITLES = ['Companhia do Sal', 'Ciclo Novas Quintas', 'Os Filmes das Nossas Terças', 'Estreia', 'Ensemble da Ria']
+
+
+def variant(title, rng):
+    """Title as another source would write it."""
+    choice = rng.randrange(4)
+    if choice == 0:
+        return f"{title} - {rng.choice(SUBTITLES)}"
+    if choice == 1:
+        return f"{title.upper()} | {rng.choice(SUBTITLES)}"
+    if choice == 2:
+        return title.replace('ç', 'c').replace('ã', 'a').replace('ó', 'o').replace('é', 'e')
+    return title
+
+
+def synthetic_history(n, seed=42):
+    """
+    Generate about n events and the set of planted duplicate pairs.
+
+    Returns:
+        (list of event dicts, set of frozenset({id, id}) duplicate pairs)
+    """
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    events, pairs = [], set()
+    i = 0
+    while len(events) < n:
+        day = (start + timedelta(days=rng.randrange(DAYS))).isoformat()
+        title = f"{rng.choice(GENRES)} {' '.join(rng.sample(WORDS, rng.randint(2, 4))).title()}"
+        source = rng.randrange(len(SOURCES))
+        event = {
+            'id': f'e{i}', 'title': title, 'source': SOURCES[source], 'start_day': day,
+            'first_seen': f'{day}T08:00:00',
+        }
+        events.append(event)
+        i += 1
+        if rng.random() < DUPLICATE_SHARE and len(events) < n:
+            other = SOURCES[(source + rng.randrange(1, len(SOURCES))) % len(SOURCES)]
+            events.append({
+                'id': f'e{i}', 'title': variant(title, rng), 'source': other, 'start_day': day,
+                'first_seen': f'{day}T09:00:00',
+            })
+            pairs.add(frozenset((f'e{i - 1}', f'e{i}')))
+            i += 1
+    return events, pairs
+
+
+def found_pairs(duplicates):
+    return {frozenset((duplicate, canonical)) for duplicate, canonical in duplicates.items()}
+
+
+def bench_find(events, pairs):
+    started = time.perf_counter()
+    duplicates, stats = find_duplicates(events)
+    elapsed = time.perf_counter() - started
+    found = found_pairs(duplicates)
+    precision = len(found & pairs) / len(found) if found else 1.0
+    recall = len(found & pairs) / len(pairs) if pairs else 1.0
+    return elapsed, stats, precision, recall
+
+
+def bench_link(events):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / 'dedup.db')
+        db.upsert_events({
+            'title': e['title'], 'start_date': e['start_day'], 'end_date': None, 'location': 'Aveiro',
+            'url': f"https://example.com/{e['id']}", 'image_url': None, 'source': e['source'], 'tags': [],
+        } for e in events)
+        started = time.perf_counter()
+        first = db.link_duplicates()
+        first_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        second = db.link_duplicates()
+        second_elapsed = time.perf_counter() - started
+        last_day = date.fromisoformat(max(e['start_day'] for e in events))
+        started = time.perf_counter()
+        daily = db.link_duplicates(from_date=(last_day - timedelta(days=UPCOMING_DAYS)).isoformat())
+        daily_elapsed = time.perf_counter() - started
+        db.close()
+    return first_elapsed, first, second_elapsed, second, daily_elapsed, daily
+
+
+def main(sizes):
+    for n in sizes:
+        events, pairs = synthetic_history(n)
+        per_day = Counter(e['start_day'] for e in events)
+        same_day_pairs = sum(k * (k - 1) // 2 for k in per_day.values())
+
+        print(f"\n{len(events)} events, {len(pairs)} planted duplicate pairs")
+        print(f"  naive pairs            all {len(events) * (len(events) - 1) // 2:>14,}   same day {same_day_pairs:>11,}")
+
+        elapsed, stats, precision, recall = bench_find(events, pairs)
+        print(f"  find_duplicates   {elapsed:>8.3f}s  {stats['comparisons']:>11,} comparisons  "
+              f"{stats['clusters']} clusters  precision {precision:.3f}  recall {recall:.3f}")
+
+        first_elapsed, first, second_elapsed, second, daily_elapsed, daily = bench_link(events)
+        print(f"  link_duplicates   {first_elapsed:>8.3f}s  first run ({first['updated']} rows written)")
+        print(f"  link_duplicates   {second_elapsed:>8.3f}s  re-run ({second['updated']} rows written)")
+        print(f"  link_duplicates   {daily_elapsed:>8.3f}s  daily run, last {UPCOMING_DAYS} days "
+              f"({daily['events']} events, {daily['updated']} rows written)")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main([int(a) for a in sys.argv[1:]] or [100000])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: full html.parser tree vs lxml + SoupStrainer container tree.
+
+Parses the saved agenda pages in benchmarks/fixtures/ both ways, checks that
+each scraper extracts the same events from either tree, and reports parse
+time (best of N) and peak memory (tracemalloc).
+
+Usage:
+    python benchmarks/bench_parsing.py [ROUNDS]   (default: 20)
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bs4 import BeautifulSoup
+
+from core.parsing import parse_html
+from scrapers import aveiroon, gretua, teatro_aveirense
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def teatro_items(soup):
+    return soup.find_all('div', class_='programa_item')
+
+
+def aveiroon_items(soup):
+    container = soup.select_one('.display-today-events.intro')
+    return container.find_all('div', class_='today-event') if container else []
+
+
+def gretua_items(soup):
+    ul_list = soup.find('ul', id='viral-events')
+    if not ul_list:
+        return []
+    return [li for li in ul_list.find_all('li', recursive=False) if 'viral-event' in li.get('class', [])]
+
+
+# (fixture, scraper module, item finder)
+SOURCES = (
+    ('teatro_aveirense.html', teatro_aveirense, teatro_items),
+    ('aveiroon.html', aveiroon, aveiroon_items),
+    ('gretua.html', gretua, gretua_items),
+)
+
+
+def parse_full(html, module):
+    return BeautifulSoup(html, 'html.parser')
+
+
+def parse_strained(html, module):
+    return parse_html(html, module.PARSE_ONLY)
+
+
+def best_time(parse, html, module, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        parse(html, module)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(parse, html, module):
+    tracemalloc.start()
+    soup = parse(html, module)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+    return peak
+
+
+def extracted_events(parse, html, module, find_items):
+    return [module._parse_event_item(item) for item in find_items(parse(html, module))]
+
+
+def main(rounds):
+    print(f"{'fixture':<22} {'mode':<16} {'items':>6} {'ms':>8} {'peak KiB':>10}")
+    for fixture, module, find_items in SOURCES:
+        html = (FIXTURES_DIR / fixture).read_text(encoding='utf-8')
+
+        full_events = extracted_events(parse_full, html, module, find_items)
+        strained_events = extracted_events(parse_strained, html, module, find_items)
+        if full_events != strained_events:
+            print(f"{fixture}: strained tree extracted different events!")
+            return 1
+
+        results = {}
+        for mode, parse in (('html.parser', parse_full), ('lxml+strainer', parse_strained)):
+            elapsed = best_time(parse, html, module, rounds)
+            peak = peak_memory(parse, html, module)
+            results[mode] = (elapsed, peak)
+            print(f"{fixture:<22} {mode:<16} {len(full_events):>6} {elapsed * 1000:>8.2f} {peak / 1024:>10.1f}")
+
+        (t_full, m_full), (t_lean, m_lean) = results['html.parser'], results['lxml+strainer']
+        print(f"{'':<22} {'speedup':<16} {'':>6} {t_full / t_lean:>7.1f}x {m_full / m_lean:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Offline scraper benchmark suite.
+
+Runs each scraper against the saved agenda pages in benchmarks/fixtures/
+and against synthetic pages made by replicating the fixture's items
+(1k-50k by default), with a fake driver, fake page cache and fake database,
+so nothing touches the network or data/events.db. It times:
+
+    parse_event_item:<source>     _parse_event_item() over the fixture items
+    date_parser:<source>          core.dates parser the scraper uses, over the fixture dates
+    scrape:<source>:<n>           the full scrape() on a page with n items
+
+Results are written as JSON (one record per benchmark with min/median
+seconds, per-item time, event count and a digest of the extracted events)
+so two runs can be compared between commits:
+
+Usage:
+    python benchmarks/bench_scrapers.py --output before.json
+    python benchmarks/bench_scrapers.py --output after.json --compare before.json
+    python benchmarks/bench_scrapers.py --sizes 1000 --repeat 3 --only gretua
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.dates import parse_date, parse_date_range
+from core.fetcher import FETCH_BROWSER, CachedPage
+from core.parsing import parse_html
+from scrapers import aveiroon, gretua, teatro_aveirense
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Per source: fixture file, the markup between items_start and items_end
+# (replicated for synthetic pages), how many events that block yields, and
+# how to find the items / date strings in a parsed fixture.
+SOURCES = {
+    'teatro_aveirense': {
+        'module': teatro_aveirense,
+        'fixture': 'teatro_aveirense.html',
+        'items_start': '<div class="programa_item',
+        'items_end': '\n</div></section>',
+        'events': 40,
+        'items': lambda soup: soup.find_all('div', class_='programa_item'),
+        'dates': lambda soup: [d.get_text(strip=True) for d in soup.select('div.programa_item div.data')],
+        'date_parser': parse_date_range,
+    },
+    'aveiroon': {
+        'module': aveiroon,
+        'fixture': 'aveiroon.html',
+        'items_start': '<div class="today-event">',
+        'items_end': '\n</div>\n<div class="display-today-events mobile">',
+        'events': 60,
+        'items': lambda soup: soup.select_one('.display-today-events.intro').find_all('div', class_='today-event'),
+        'dates': lambda soup: [p.get_text(strip=True) for p in soup.select('.display-today-events.intro div.date-today-event p')],
+        'date_parser': parse_date,
+    },
+    'gretua': {
+        'module': gretua,
+        'fixture': 'gretua.html',
+        'items_start': '<li class="viral-event"',
+        'items_end': '<li class="viral-event-past">',
+        'events': 28,
+        'items': lambda soup: soup.select('#viral-events > li.viral-event'),
+        'dates': None,
+        'date_parser': None,
+    },
+}
+
+# Date strings per date_parser round (fixture dates repeated)
+DATE_SAMPLES = 10000
+
+
+class BenchmarkFailure(Exception):
+    """A benchmark found nothing to time or extracted the wrong events."""
+
+
+class FakeDriver:
+    """Stands in for a WebDriver: get() is a no-op and page_source is fixed."""
+
+    def __init__(self, html: str):
+        self.page_source = html
+        self.current_url = None
+
+    def get(self, url):
+        self.current_url = url
+
+
+class FakeWait:
+    """Stands in for WebDriverWait: every condition is met immediately."""
+
+    def __init__(self, driver, timeout, *args, **kwargs):
+        self.driver = driver
+
+    def until(self, method, message=''):
+        return True
+
+
+class FakeDatabase:
+    """Collects upserted events in memory (same write API as EventDatabase)."""
+
+    def __init__(self):
+        self.events = []
+
+    @contextmanager
+    def batch(self):
+        yield self
+
+    def upsert_event(self, event):
+        self.events.append(event)
+
+    def upsert_events(self, events):
+        self.events.extend(events)
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+
+@contextmanager
+def offline(module, html: str):
+    """
+    Patch a scraper module so scrape() reads html instead of the live page.
+
+    Args:
+        module: Scraper module
+        html: Page HTML served by the fake page cache / fake driver
+    """
+    def fake_check_page(url, text):
+        return CachedPage(url, text, 'benchmark', changed=True, not_modified=False)
+
+    replacements = {
+        'fetch_page': lambda url, *args, **kwargs: fake_check_page(url, html),
+        'check_page': fake_check_page,
+        'mark_page_processed': lambda page: None,
+        'wait_for_ready': lambda *args, **kwargs: 0.0,
+        'WebDriverWait': FakeWait,
+    }
+    saved = {name: getattr(module, name) for name in replacements if hasattr(module, name)}
+    for name in saved:
+        setattr(module, name, replacements[name])
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def synthetic_page(spec, html: str, n_events: int):
+    """
+    Build a page with about n_events events by repeating the fixture's item block.
+
+    Returns:
+        (page HTML, number of events it holds)
+    """
+    start = html.index(spec['items_start'])
+    end = html.index(spec['items_end'], start)
+    copies = max(1, math.ceil(n_events / spec['events']))
+    block = html[start:end]
+    return html[:start] + '\n'.join([block] * copies) + html[end:], copies * spec['events']
+
+
+def digest(events) -> str:
+    """Stable hash of extracted events, to spot output changes between commits."""
+    payload = json.dumps(events, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def timed(run, repeat: int, setup=None):
+    """
+    Time run() repeat times (setup() is called untimed before each round).
+
+    Returns:
+        (list of seconds per round, result of the last round)
+    """
+    times, result = [], None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        result = run(arg) if setup else run()
+        times.append(time.perf_counter() - started)
+    return times, result
+
+
+def record(name, times, items, events=None):
+    best = min(times)
+    return {
+        'name': name,
+        'items': items,
+        'rounds': len(times),
+        'min_s': round(best, 6),
+        'median_s': round(statistics.median(times), 6),
+        'per_item_us': round(best / items * 1e6, 3) if items else None,
+        'events': len(events) if events is not None else None,
+        'digest': digest(events) if events is not None else None,
+    }
+
+
+def bench_source(key, spec, sizes, repeat):
+    module = spec['module']
+    html = (FIXTURES_DIR / spec['fixture']).read_text(encoding='utf-8')
+    soup = parse_html(html, module.PARSE_ONLY)
+    results = []
+
+    # _parse_event_item (copies made outside the timer: teatro's parser edits the tree)
+    items = spec['items'](soup)
+    if not items:
+        raise BenchmarkFailure(f"{key}: no items found in {spec['fixture']} (PARSE_ONLY or items selector broken?)")
+    times, parsed = timed(
+        lambda batch: [module._parse_event_item(item) for item in batch],
+        repeat, setup=lambda: [copy.copy(item) for item in items]
+    )
+    results.append(record(f'parse_event_item:{key}', times, len(items), [e for e in parsed if e]))
+
+    # Date parser
+    if spec['date_parser']:
+        parse = spec['date_parser']
+        samples = spec['dates'](soup)
+        if not samples:
+            raise BenchmarkFailure(f"{key}: no date strings found in {spec['fixture']}")
+        samples = (samples * math.ceil(DATE_SAMPLES / len(samples)))[:DATE_SAMPLES]
+        times, parsed = timed(lambda: [parse(text) for text in samples], repeat)
+        results.append(record(f'date_parser:{key}', times, len(samples), parsed))
+
+    # Full scrape() on the fixture and on synthetic pages
+    pages = [('fixture', html, spec['events'])]
+    for n in sizes:
+        page, n_events = synthetic_page(spec, html, n)
+        pages.append((str(n), page, n_events))
+
+    for label, page, n_events in pages:
+        def run():
+            db = FakeDatabase()
+            driver = FakeDriver(page) if module.FETCH_MODE == FETCH_BROWSER else None
+            with offline(module, page):
+                module.scrape(driver, db)
+            return db.events
+
+        times, events = timed(run, repeat)
+        if len(events) != n_events:
+            raise BenchmarkFailure(f"scrape:{key}:{label} extracted {len(events)} events, expected {n_events}")
+        results.append(record(f'scrape:{key}:{label}', times, n_events, events))
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold: float):
+    """
+    Print changes against a baseline run.
+
+    Returns:
+        Number of regressions (slower than threshold, or different output)
+    """
+    previous = {r['name']: r for r in baseline['results']}
+    regressions = 0
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:", file=sys.stderr)
+    for r in results:
+        old = previous.get(r['name'])
+        if not old:
+            continue
+        ratio = r['min_s'] / old['min_s'] if old['min_s'] else 1.0
+        notes = []
+        if ratio > 1 + threshold:
+            notes.append('SLOWER')
+        if (r['events'], r['digest']) != (old['events'], old['digest']):
+            notes.append(f"OUTPUT CHANGED ({old['events']} -> {r['events']} events)")
+        regressions += bool(notes)
+        print(f"  {r['name']:<36} {ratio:>6.2f}x  {' '.join(notes)}", file=sys.stderr)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 50000],
+                        help="Synthetic page sizes in events (default: 1000 10000 50000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Rounds per benchmark (default: 3)")
+    parser.add_argument('--only', nargs='*', choices=sorted(SOURCES), help="Only these sources")
+    parser.add_argument('--output', type=Path, help="Write JSON results here (default: stdout)")
+    parser.add_argument('--compare', type=Path, help="Baseline JSON from a previous run")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Slowdown ratio counted as a regression (default: 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+
+    results = []
+    for key in args.only or SOURCES:
+        try:
+            source_results = bench_source(key, SOURCES[key], args.sizes, args.repeat)
+        except BenchmarkFailure as e:
+            print(f"FAILED: {e}", file=sys.stderr)
+            return 1
+        for r in source_results:
+            results.append(r)
+            print(f"{r['name']:<36} {r['items']:>7} items {r['min_s'] * 1000:>10.2f} ms "
+                  f"{r['per_item_us'] or 0:>9.2f} us/item", file=sys.stderr)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: EventDatabase.search() latency as the event history grows.
+
+Fills a temporary database with n synthetic events: a fixed agenda of
+upcoming events (FUTURE_EVENTS over the next year) plus a past history
+that grows with n, as the real database does. Times a mix of rare,
+common, prefix and multi-word queries with the default window (today
+onwards), which should stay flat as the history grows, and over the
+whole history.
+
+Usage:
+    python benchmarks/bench_search.py [N ...]   (default: 10000 100000 300000)
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import EventDatabase
+
+WORDS = (
+    'noite luz mar sal ria vento casa corpo voz cidade tempo memória jardim fado jazz '
+    'quarteto sonata dança silêncio viagem terra fogo água lua sol barco canal ponte '
+    'ilha sombra espelho retrato palavra poema canção orquestra coro ensemble trio'
+).split()
+GENRES = ['Concerto', 'Teatro', 'Dança', 'Cinema', 'Festival', 'Exposição']
+LOCATIONS = ['Teatro Aveirense', 'GrETUA', 'Mercado Negro', 'Avenida Café', 'Centro Cultural de Ílhavo']
+TAGS = ['Música', 'Teatro', 'Dança', 'Cinema', 'Infantil', 'Exposição', 'Workshop']
+
+QUERIES = ['concerto', 'teatro aveirense', 'dan', 'musica', 'fado noite', 'orq', 'canção mar', 'zzz']
+
+# Upcoming events, whatever the size of the history
+FUTURE_EVENTS = 3000
+
+# Rounds per query
+REPEAT = 20
+
+
+def synthetic_events(n, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    for i in range(n):
+        if i < FUTURE_EVENTS:
+            day = today + timedelta(days=rng.randrange(365))
+        else:
+            day = today - timedelta(days=rng.randrange(1, 10 * 365))
+        yield {
+            'title': f"{rng.choice(GENRES)} {' '.join(rng.sample(WORDS, rng.randint(2, 4))).title()}",
+            'start_date': day.isoformat(),
+            'end_date': None,
+            'location': rng.choice(LOCATIONS),
+            'url': f'https://example.com/search/{i}',
+            'image_url': None,
+            'source': rng.choice(LOCATIONS),
+            'tags': rng.sample(TAGS, rng.randint(1, 2)),
+        }
+
+
+def main(sizes):
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = EventDatabase(db_path=Path(tmp) / 'search.db')
+            started = time.perf_counter()
+            db.upsert_events(synthetic_events(n))
+            print(f"\n{n} events indexed in {time.perf_counter() - started:.1f}s")
+            print(f"  {'query':<20} {'window':<8} {'hits':>5} {'p50 ms':>8} {'max ms':>8}")
+
+            for query in QUERIES:
+                for window, from_date in (('future', None), ('all', '0000-01-01')):
+                    times = []
+                    for _ in range(REPEAT):
+                        t0 = time.perf_counter()
+                        hits = db.search(query, from_date=from_date)['events']
+                        times.append((time.perf_counter() - t0) * 1000)
+                    print(f"  {query:<20} {window:<8} {len(hits):>5} "
+                          f"{statistics.median(times):>8.2f} {max(times):>8.2f}")
+            db.close()
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000, 300000])
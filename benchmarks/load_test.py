@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Small load test for server.py: reports requests/s and latency percentiles.
+
+Usage:
+    python server.py --quiet &
+    python benchmarks/load_test.py [--url http://localhost:8000/data/events.json]
+                                   [--requests 2000] [--concurrency 16] [--revalidate] [--gzip]
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def worker(url, count, headers, latencies, errors, lock):
+    """Send count GET requests over one keep-alive connection."""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    local, failed = [], 0
+
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local.append(time.perf_counter() - started)
+
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += failed
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the local server")
+    parser.add_argument('--url', default='http://localhost:8000/data/events.json')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--revalidate', action='store_true',
+                        help="Send If-None-Match with the current ETag (measures 304s)")
+    parser.add_argument('--gzip', action='store_true', help="Send Accept-Encoding: gzip, br")
+    args = parser.parse_args()
+
+    headers = {}
+    if args.gzip:
+        headers['Accept-Encoding'] = 'gzip, br'
+    if args.revalidate:
+        parts = urlsplit(args.url)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        conn.request('GET', parts.path or '/', headers=headers)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        if response.getheader('ETag'):
+            headers['If-None-Match'] = response.getheader('ETag')
+
+    per_worker = [args.requests // args.concurrency] * args.concurrency
+    for i in range(args.requests % args.concurrency):
+        per_worker[i] += 1
+
+    latencies, errors, lock = [], [0], threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(args.url, n, headers, latencies, errors, lock))
+        for n in per_worker if n
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"URL:          {args.url}")
+    print(f"Requests:     {len(latencies)} ({errors[0]} errors), concurrency {args.concurrency}")
+    print(f"Throughput:   {len(latencies) / elapsed:.0f} requests/s")
+    print(f"Latency p50:  {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"Latency p99:  {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"Latency max:  {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
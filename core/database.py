@@ -4,50 +4,292 @@ Handles event storage, deduplication, and JSON export.
 """
 
 import sqlite3
+import os
+import base64
 import json
 import hashlib
+import re
 import logging
-from datetime import datetime
+import tempfile
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.dedup import find_duplicates
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = Path(__file__).parent.parent / "data" / "events.db"
 JSON_PATH = Path(__file__).parent.parent / "data" / "events.json"
+SHARDS_DIR = Path(__file__).parent.parent / "data" / "events"
+MANIFEST_NAME = "manifest.json"
+
+# Shard key for events without a start date
+UNDATED_SHARD = "undated"
+
+# Columns returned to callers / exported to JSON
+EVENT_COLUMNS = """
+    id, title, start_date, end_date, location,
+    url, image_url, source, tags, scraped_at
+"""
+
+UPSERT_SQL = """
+    INSERT INTO events (
+        id, title, start_date, start_day, end_date, location, 
+        url, image_url, source, tags, scraped_at,
+        content_hash, first_seen, last_changed
+    ) VALUES (
+        :id, :title, :start_date, :start_day, :end_date, :location,
+        :url, :image_url, :source, :tags, :scraped_at,
+        :content_hash, :scraped_at, :scraped_at
+    )
+    ON CONFLICT(url) DO UPDATE SET
+        title = excluded.title,
+        start_date = excluded.start_date,
+        start_day = excluded.start_day,
+        end_date = excluded.end_date,
+        location = excluded.location,
+        image_url = excluded.image_url,
+        tags = excluded.tags,
+        content_hash = excluded.content_hash,
+        scraped_at = excluded.scraped_at,
+        last_changed = excluded.scraped_at
+    WHERE events.content_hash IS NOT excluded.content_hash
+"""
+
+# Connection pragmas. WAL lets readers (server.py, exports) run while a
+# scrape is writing; synchronous=NORMAL is durable across app crashes in WAL.
+SYNCHRONOUS = "NORMAL"
+CACHE_SIZE_KIB = 16 * 1024
+MMAP_SIZE = 64 * 1024 * 1024
+# Wait this long for a lock instead of failing with "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# Fields left out of the export content hash (they change on every run)
+VOLATILE_FIELDS = ('scraped_at',)
+
+# Columns covered by content_hash; an upsert only writes when one of them changed
+CONTENT_FIELDS = ('title', 'start_date', 'end_date', 'location', 'image_url', 'tags')
+
+# Full-text index over title, location and tags. It is an external content
+# table reading from the events_fts_content view, which indexes the tag
+# values (not their JSON text) and a hidden "period" token per event month
+# ("m202610") so date windows are narrowed inside the index. Accents are
+# folded ("musica" finds "Música") and 2/3-character prefixes are indexed
+# for search-as-you-type queries.
+FTS_TAGS = "CASE WHEN json_valid({row}.tags) THEN (SELECT group_concat(value, ' ') FROM json_each({row}.tags)) END"
+FTS_PERIOD = "'m' || replace(substr({row}.start_day, 1, 7), '-', '')"
+FTS_COLUMNS = "title, location, tags, period"
+
+FTS_SQL = (
+    f"""
+    CREATE VIEW IF NOT EXISTS events_fts_content AS
+    SELECT rowid AS event_rowid, title, location,
+           {FTS_TAGS.format(row='events')} AS tags,
+           {FTS_PERIOD.format(row='events')} AS period
+    FROM events
+    """,
+    f"""
+    CREATE VIRTUAL TABLE events_fts USING fts5(
+        {FTS_COLUMNS},
+        content='events_fts_content', content_rowid='event_rowid',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    INSERT INTO events_fts (rowid, {FTS_COLUMNS})
+    SELECT event_rowid, {FTS_COLUMNS} FROM events_fts_content
+    """,
+)
+
+
+def _fts_values(row: str) -> str:
+    """Indexed values of the events row 'new' or 'old', for the triggers."""
+    return (f"{row}.rowid, {row}.title, {row}.location, "
+            f"{FTS_TAGS.format(row=row)}, {FTS_PERIOD.format(row=row)}")
+
+
+# Keep events_fts in sync with every write to events
+FTS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts (rowid, {FTS_COLUMNS}) VALUES ({_fts_values('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts (events_fts, rowid, {FTS_COLUMNS}) VALUES ('delete', {_fts_values('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF title, location, tags, start_day ON events BEGIN
+        INSERT INTO events_fts (events_fts, rowid, {FTS_COLUMNS}) VALUES ('delete', {_fts_values('old')});
+        INSERT INTO events_fts (rowid, {FTS_COLUMNS}) VALUES ({_fts_values('new')});
+    END
+    """,
+)
+
+# Tag values of an events row ('new', 'old' or 'events'), as rows of json_each()
+TAG_VALUES = "json_each(CASE WHEN json_valid({row}.tags) THEN {row}.tags ELSE '[]' END) AS tag_value"
+
+# Add the tags of events rows to tags / event_tags: {row} is the row
+# ('new' in triggers) and {rows} what it is selected from ('events, ' when
+# migrating every row, empty in triggers). Conflicts are avoided with NOT
+# EXISTS rather than OR IGNORE, which an upsert firing the trigger overrides.
+LINK_TAGS_SQL = (
+    f"""
+    INSERT INTO tags (name)
+    SELECT DISTINCT tag_value.value FROM {{rows}}{TAG_VALUES}
+    WHERE tag_value.type = 'text'
+      AND NOT EXISTS (SELECT 1 FROM tags WHERE tags.name = tag_value.value)
+    """,
+    f"""
+    INSERT INTO event_tags (event_id, tag_id)
+    SELECT DISTINCT {{row}}.id, tags.id FROM {{rows}}{TAG_VALUES}
+    JOIN tags ON tags.name = tag_value.value
+    WHERE NOT EXISTS (
+        SELECT 1 FROM event_tags WHERE event_tags.event_id = {{row}}.id AND event_tags.tag_id = tags.id
+    )
+    """,
+)
+_LINK_NEW_TAGS = ';'.join(sql.format(row='new', rows='') for sql in LINK_TAGS_SQL)
+
+# Keep event_tags in sync with events.tags (the JSON column stays the source of truth)
+TAG_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS event_tags_insert AFTER INSERT ON events BEGIN
+        {_LINK_NEW_TAGS};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS event_tags_delete AFTER DELETE ON events BEGIN
+        DELETE FROM event_tags WHERE event_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS event_tags_update AFTER UPDATE OF tags ON events BEGIN
+        DELETE FROM event_tags WHERE event_id = old.id;
+        {_LINK_NEW_TAGS};
+    END
+    """,
+)
+
+# bm25() weights of title, location, tags and period in search() ranking
+FTS_WEIGHTS = (10.0, 2.0, 5.0, 0.0)
+
+# YYYY-MM-DD day, as in start_day and pagination cursors
+ISO_DAY = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Words of a search query (quoted one by one, so FTS5 syntax can't leak in)
+SEARCH_WORD = re.compile(r'\w+')
+
+# EVENT_COLUMNS qualified with the table name, for queries joining events_fts
+QUALIFIED_EVENT_COLUMNS = ', '.join(f"events.{column.strip()}" for column in EVENT_COLUMNS.split(','))
 
 
 class EventDatabase:
     """SQLite database manager for cultural events."""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, read_only: bool = False):
         """
         Initialize database connection and create tables if needed.
 
         Args:
             db_path: Optional custom database path
+            read_only: Open an existing database read-only (no schema changes)
         """
         self.db_path = db_path or DB_PATH
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read_only = read_only
+        if not read_only:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.conn = None
         self.cursor = None
+        # Serializes writes when scrapers run concurrently on worker threads
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._readers = None
+        # Events upserted since start_run_diff(), per source (see run_diff()),
+        # and those written by the open transaction, merged in on commit
+        self._run_diff = {}
+        self._pending_diff = {}
+        # Whether the last export_to_json() call actually rewrote the file
+        self.last_export_changed = None
         self._connect()
-        self._create_tables()
+        if not read_only:
+            self._create_tables()
 
     def _connect(self):
         """Establish database connection."""
-        self.conn = sqlite3.connect(str(self.db_path))
+        if self.read_only:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.conn.row_factory = sqlite3.Row  # Access columns by name
+        self._apply_pragmas()
         self.cursor = self.conn.cursor()
         logger.info(f"Database connected: {self.db_path}")
 
+    def _apply_pragmas(self):
+        """Set cache/mmap/busy-timeout pragmas and, on the writer, WAL mode."""
+        self.conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        self.conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        self.conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        if self.read_only:
+            self.conn.execute("PRAGMA query_only = ON")
+            return
+
+        # journal_mode is stored in the file, so readers see WAL too
+        mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if mode.lower() != 'wal':
+            logger.warning(f"Could not enable WAL, journal mode is {mode}")
+        self.conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+
+    @contextmanager
+    def reader(self):
+        """
+        Borrow a read-only connection to this database.
+
+        Reads through it never wait for (or block) this instance's writes;
+        they see the last committed state.
+        """
+        if self._readers is None:
+            self._readers = ReadOnlyDatabasePool(self.db_path)
+        with self._readers.connection() as db:
+            yield db
+
+    def checkpoint(self, mode: str = "TRUNCATE") -> Dict[str, int]:
+        """
+        Copy the WAL into the database file (run before events.db is committed).
+
+        Args:
+            mode: wal_checkpoint mode; TRUNCATE also empties the -wal file
+
+        Returns:
+            Dictionary with 'busy' (1 if readers prevented a full checkpoint),
+            'log_frames' and 'checkpointed' frame counts
+        """
+        with self._lock:
+            self.conn.commit()
+            busy, log_frames, checkpointed = self.conn.execute(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).fetchone()
+        if busy:
+            logger.warning("WAL checkpoint incomplete: database busy")
+        return {'busy': busy, 'log_frames': log_frames, 'checkpointed': checkpointed}
+
     def _create_tables(self):
-        """Create events table if it doesn't exist."""
+        """Create events table and indexes if they don't exist."""
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS events (
                 id TEXT PRIMARY KEY,
                 title TEXT NOT NULL,
                 start_date TEXT,
+                start_day TEXT,
                 end_date TEXT,
                 location TEXT,
                 url TEXT UNIQUE NOT NULL,
@@ -55,116 +297,812 @@ class EventDatabase:
                 source TEXT NOT NULL,
                 tags TEXT,
                 scraped_at TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                content_hash TEXT,
+                first_seen TEXT,
+                last_changed TEXT,
+                canonical_id TEXT
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
             )
         """)
+        self._migrate_start_day()
+        self._migrate_change_tracking()
+        self._migrate_canonical_id()
+        self._create_fts()
+        self._create_tag_tables()
+
+        # Future-events export and per-source lookups are range scans on these
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_start_day
+            ON events (start_day, start_date)
+        """)
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_source_start_day
+            ON events (source, start_day, start_date)
+        """)
         self.conn.commit()
         logger.info("Database tables initialized")
 
+    def _migrate_start_day(self):
+        """Add and backfill the normalized start_day column on older databases."""
+        columns = {row['name'] for row in self.cursor.execute("PRAGMA table_info(events)")}
+        if 'start_day' in columns:
+            return
+
+        logger.info("Migrating events table: adding start_day column")
+        self.cursor.execute("ALTER TABLE events ADD COLUMN start_day TEXT")
+        self.cursor.execute("""
+            UPDATE events SET start_day = substr(start_date, 1, 10)
+            WHERE start_date IS NOT NULL
+        """)
+
+    def _migrate_change_tracking(self):
+        """Add and backfill content_hash / first_seen / last_changed on older databases."""
+        columns = {row['name'] for row in self.cursor.execute("PRAGMA table_info(events)")}
+        if 'content_hash' in columns:
+            return
+
+        logger.info("Migrating events table: adding content_hash, first_seen, last_changed")
+        for column in ('content_hash', 'first_seen', 'last_changed'):
+            self.cursor.execute(f"ALTER TABLE events ADD COLUMN {column} TEXT")
+        self.cursor.execute("""
+            UPDATE events SET first_seen = COALESCE(created_at, scraped_at), last_changed = scraped_at
+        """)
+        rows = self.cursor.execute(f"SELECT url, {', '.join(CONTENT_FIELDS)} FROM events").fetchall()
+        self.cursor.executemany(
+            "UPDATE events SET content_hash = ? WHERE url = ?",
+            [(self.content_hash(dict(row)), row['url']) for row in rows]
+        )
+
+    def _migrate_canonical_id(self):
+        """Add canonical_id (set by link_duplicates()) on older databases."""
+        columns = {row['name'] for row in self.cursor.execute("PRAGMA table_info(events)")}
+        if 'canonical_id' not in columns:
+            logger.info("Migrating events table: adding canonical_id")
+            self.cursor.execute("ALTER TABLE events ADD COLUMN canonical_id TEXT")
+
+    def _create_fts(self):
+        """Create events_fts and its triggers, indexing existing events the first time."""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'")
+        if not self.cursor.fetchone():
+            logger.info("Building full-text index over existing events")
+            try:
+                for sql in FTS_SQL:
+                    self.cursor.execute(sql)
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5: everything but search() keeps working
+                logger.warning(f"Full-text search unavailable: {e}")
+                return
+        for trigger in FTS_TRIGGERS:
+            self.cursor.execute(trigger)
+
+    def _create_tag_tables(self):
+        """Create tags / event_tags and their triggers, filling them from events the first time."""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_tags'")
+        is_new = not self.cursor.fetchone()
+
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL
+            )
+        """)
+        # Keyed by event, plus the reverse index for "events with tag X"
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS event_tags (
+                event_id TEXT NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+                tag_id INTEGER NOT NULL REFERENCES tags (id),
+                PRIMARY KEY (event_id, tag_id)
+            ) WITHOUT ROWID
+        """)
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_event_tags_tag
+            ON event_tags (tag_id, event_id)
+        """)
+        for trigger in TAG_TRIGGERS:
+            self.cursor.execute(trigger)
+
+        if is_new:
+            logger.info("Migrating tags: filling tags / event_tags from events")
+            for sql in LINK_TAGS_SQL:
+                self.cursor.execute(sql.format(row='events', rows='events, '))
+
     @staticmethod
-    def generate_event_id(url: str) -> str:
+    def content_hash(event: Dict) -> str:
         """
-        Generate unique event ID based on URL hash.
+        Hash the content fields of an event (tags as stored, i.e. JSON text).
 
         Args:
-            url: Event URL
+            event: Event dictionary or row
 
         Returns:
-            SHA256 hash of the URL (first 16 characters)
+            Hex digest compared on upsert to skip unchanged events
         """
-        return hashlib.sha256(url.encode()).hexdigest()[:16]
+        payload = json.dumps([event.get(f) for f in CONTENT_FIELDS], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
 
-    def upsert_event(self, event_data: Dict) -> bool:
+    @staticmethod
+    def normalize_day(value: Optional[str]) -> Optional[str]:
         """
-        Insert or update an event (prevents duplicates by URL).
+        Reduce an ISO-8601 date or datetime to its YYYY-MM-DD day.
 
         Args:
-            event_data: Dictionary with event fields
+            value: Date string such as '2026-07-25' or '2026-07-25T21:00:00'
+
+        Returns:
+            The date part, or None if no date is given
+        """
+        return value[:10] if value else None
+
+    @staticmethod
+    def generate_event_id(url: str) -> str:
+        """
+        Generate unique event ID based on URL hash.
+
+        Args:
+            url: Event URL
 
         Returns:
-            True if inserted, False if already exists
+            SHA256 hash of the URL (first 16 characters)
         """
+        return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+    def _prepare_event(self, event_data: Dict) -> Dict:
+        """Fill in id/scraped_at/content_hash and serialize tags before writing an event."""
         # Generate ID from URL
-        event_id = self.generate_event_id(event_data['url'])
+        event_data['id'] = self.generate_event_id(event_data['url'])
 
         # Add metadata
-        event_data['id'] = event_id
         event_data['scraped_at'] = datetime.now().isoformat()
+        event_data['start_day'] = self.normalize_day(event_data.get('start_date'))
 
         # Convert tags list to JSON string
         if 'tags' in event_data and isinstance(event_data['tags'], list):
             event_data['tags'] = json.dumps(event_data['tags'])
 
-        try:
-            self.cursor.execute("""
-                INSERT INTO events (
-                    id, title, start_date, end_date, location, 
-                    url, image_url, source, tags, scraped_at
-                ) VALUES (
-                    :id, :title, :start_date, :end_date, :location,
-                    :url, :image_url, :source, :tags, :scraped_at
-                )
-                ON CONFLICT(url) DO UPDATE SET
-                    title = excluded.title,
-                    start_date = excluded.start_date,
-                    end_date = excluded.end_date,
-                    location = excluded.location,
-                    image_url = excluded.image_url,
-                    scraped_at = excluded.scraped_at
-            """, event_data)
-            self.conn.commit()
+        event_data['content_hash'] = self.content_hash(event_data)
+        return event_data
 
-            # Check if it was an insert or update
-            if self.cursor.rowcount > 0:
-                logger.debug(f"Event upserted: {event_data.get('title', 'Unknown')}")
-                return True
-            return False
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into a single transaction, committed once on exit.
+
+        upsert_event() calls made inside the block don't commit individually.
+        The transaction is rolled back if the block raises. Batches may be nested;
+        only the outermost one commits.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+                if self._batch_depth == 1:
+                    self.conn.commit()
+                    _merge_diff(self._run_diff, self._pending_diff)
+                    self._pending_diff = {}
+            except Exception:
+                if self._batch_depth == 1:
+                    self.conn.rollback()
+                    self._pending_diff = {}
+                raise
+            finally:
+                self._batch_depth -= 1
+
+    def upsert_event(self, event_data: Dict) -> bool:
+        """
+        Insert or update an event (prevents duplicates by URL).
 
+        Nothing is written when the stored event has the same content hash.
+
+        Args:
+            event_data: Dictionary with event fields
+
+        Returns:
+            True if the event was inserted or changed, False if unchanged
+        """
+        try:
+            counts = self._upsert_rows([self._prepare_event(event_data)])
         except sqlite3.IntegrityError as e:
             logger.warning(f"Duplicate event skipped: {event_data.get('url', 'Unknown')} - {e}")
             return False
         except Exception as e:
             logger.error(f"Error inserting event: {e}")
-            self.conn.rollback()
             return False
 
-    def get_future_events(self) -> List[Dict]:
+        if counts['unchanged']:
+            return False
+        logger.debug(f"Event upserted: {event_data.get('title', 'Unknown')}")
+        return True
+
+    def upsert_events(self, events: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Insert or update many events in a single transaction.
+
+        Only new events and events whose content hash changed are written.
+
+        Args:
+            events: Iterable of event dictionaries (same fields as upsert_event)
+
+        Returns:
+            Dictionary with 'inserted', 'updated' and 'unchanged' counts
+        """
+        rows = [self._prepare_event(event) for event in events]
+        counts = self._upsert_rows(rows)
+        if rows:
+            logger.info(
+                f"Bulk upsert of {len(rows)} events: {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+            )
+        return counts
+
+    def _upsert_rows(self, rows: List[Dict]) -> Dict[str, int]:
+        """
+        Write the prepared rows whose content changed and track them in the
+        run diff once the write is committed.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not rows:
+            return counts
+
+        with self._lock:
+            existing = self._get_existing_rows([row['url'] for row in rows])
+            changed_rows = []
+            row_diff = {}
+
+            for row in rows:
+                previous = existing.get(row['url'])
+                source_diff = row_diff.setdefault(row['source'], _new_source_diff())
+                source_diff['seen'].add(row['url'])
+                if previous is None:
+                    counts['inserted'] += 1
+                    source_diff['added'].append(_diff_entry(row))
+                elif previous['content_hash'] != row['content_hash']:
+                    counts['updated'] += 1
+                    entry = _diff_entry(row)
+                    entry['fields'] = [f for f in CONTENT_FIELDS if previous.get(f) != row.get(f)]
+                    source_diff['changed'].append(entry)
+                else:
+                    counts['unchanged'] += 1
+                    source_diff['unchanged'] += 1
+                    continue
+                changed_rows.append(row)
+                # Later duplicates of the same URL compare against this row
+                existing[row['url']] = {f: row.get(f) for f in CONTENT_FIELDS + ('content_hash',)}
+
+            with self.batch():
+                if changed_rows:
+                    self.cursor.executemany(UPSERT_SQL, changed_rows)
+                _merge_diff(self._pending_diff, row_diff)
+        return counts
+
+    def _get_existing_rows(self, urls: List[str], chunk_size: int = 500) -> Dict[str, Dict]:
+        """Fetch the content fields and hash of already stored events, keyed by URL."""
+        fields = CONTENT_FIELDS + ('content_hash',)
+        columns = ', '.join(fields)
+        existing = {}
+        unique_urls = list(dict.fromkeys(urls))
+
+        for i in range(0, len(unique_urls), chunk_size):
+            chunk = unique_urls[i:i + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            self.cursor.execute(
+                f"SELECT url, {columns} FROM events WHERE url IN ({placeholders})", chunk
+            )
+            for row in self.cursor.fetchall():
+                existing[row['url']] = {f: row[f] for f in fields}
+
+        return existing
+
+    def start_run_diff(self):
+        """Forget the events tracked so far; run_diff() then covers writes from here on."""
+        with self._lock:
+            self._run_diff = {}
+            self._pending_diff = {}
+
+    def run_diff(self, sources: Iterable[str] = ()) -> Dict[str, Dict]:
+        """
+        Per-source diff of the events upserted since start_run_diff().
+
+        Vanished events are stored future events of a source that weren't
+        upserted in this run. Only committed writes count.
+
+        Args:
+            sources: Sources that ran in this run, reported even when they
+                upserted nothing (then all their future events vanished);
+                sources skipped because their page didn't change should be
+                left out, since nothing can be said about them
+
+        Returns:
+            {source: {'added': [...], 'changed': [...], 'vanished': [...],
+            'unchanged': n}}; entries hold id, title, url and start_date
+            ('changed' ones also list the changed 'fields')
+        """
+        today = date.today().isoformat()
+        diff = {}
+        with self._lock:
+            tracked_sources = dict.fromkeys(list(self._run_diff) + list(sources))
+            for source in tracked_sources:
+                tracked = self._run_diff.get(source) or _new_source_diff()
+                self.cursor.execute("""
+                    SELECT id, title, url, start_date FROM events
+                    WHERE source = ? AND (start_day IS NULL OR start_day >= ?)
+                """, (source, today))
+                vanished = [
+                    _diff_entry(row) for row in self.cursor.fetchall()
+                    if row['url'] not in tracked['seen']
+                ]
+                diff[source] = {
+                    'added': list(tracked['added']),
+                    'changed': list(tracked['changed']),
+                    'vanished': vanished,
+                    'unchanged': tracked['unchanged'],
+                }
+        return diff
+
+    def link_duplicates(self, from_date: Optional[str] = None) -> Dict:
+        """
+        Link the same show listed by several sources to one canonical event.
+
+        Runs core.dedup.find_duplicates() over the dated events and stores
+        each duplicate's canonical event id in canonical_id (NULL for
+        canonical and unique events). Links are recomputed from scratch, so
+        an event whose title changed is unlinked again; only rows whose
+        link changed are written.
+
+        Args:
+            from_date: Only consider events from this day (YYYY-MM-DD)
+                onwards; None covers the whole history
+
+        Returns:
+            find_duplicates() stats plus 'duplicates' (linked events) and
+            'updated' (rows whose link changed)
+        """
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT id, title, source, start_day, first_seen, canonical_id
+                FROM events
+                WHERE start_day >= ?
+            """, (from_date or '',)).fetchall()
+
+            duplicates, stats = find_duplicates(dict(row) for row in rows)
+            updates = [
+                (duplicates.get(row['id']), row['id'])
+                for row in rows if row['canonical_id'] != duplicates.get(row['id'])
+            ]
+            if updates:
+                with self.batch():
+                    self.cursor.executemany("UPDATE events SET canonical_id = ? WHERE id = ?", updates)
+
+        stats.update(duplicates=len(duplicates), updated=len(updates))
+        logger.info(
+            f"Linked {stats['duplicates']} duplicate events into {stats['clusters']} canonical events "
+            f"({stats['comparisons']} comparisons over {stats['events']} events, {stats['updated']} rows updated)"
+        )
+        return stats
+
+    def _future_events_queries(self, source: Optional[str] = None) -> List[tuple]:
+        """
+        Build the queries behind get_future_events().
+
+        Undated events and the dated range are fetched separately so each
+        part is an index lookup instead of a scan over the whole history.
+        Undated events come first, as they did with ORDER BY start_date.
+        Without a source, duplicates linked to a canonical event of another
+        source are left out (see link_duplicates()).
+
+        Returns:
+            List of (sql, params) tuples, executed in order
+        """
+        today = date.today().isoformat()
+        source_clause = "AND source = ?" if source else "AND canonical_id IS NULL"
+        source_params = (source,) if source else ()
+
+        return [
+            (f"""
+                SELECT {EVENT_COLUMNS}
+                FROM events
+                WHERE start_day IS NULL {source_clause}
+            """, source_params),
+            (f"""
+                SELECT {EVENT_COLUMNS}
+                FROM events
+                WHERE start_day >= ? {source_clause}
+                ORDER BY start_day ASC, start_date ASC
+            """, (today,) + source_params),
+        ]
+
+    def iter_future_events(self, source: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream events from today onwards (or undated) row by row.
+
+        Args:
+            source: Optional source name to restrict the results to
+
+        Yields:
+            Event dictionaries, in the same order as get_future_events()
+        """
+        for sql, params in self._future_events_queries(source):
+            # Own cursor, so callers can keep using self.cursor while iterating
+            for row in self.conn.execute(sql, params):
+                yield self._row_to_event(row)
+
+    @staticmethod
+    def _row_to_event(row: sqlite3.Row) -> Dict:
+        """Convert an events row to a dictionary with tags decoded."""
+        event = dict(row)
+        # Parse tags back to list
+        if event['tags']:
+            try:
+                event['tags'] = json.loads(event['tags'])
+            except json.JSONDecodeError:
+                event['tags'] = []
+        return event
+
+    def count_future_events(self, source: Optional[str] = None) -> int:
+        """
+        Count events from today onwards (or undated) without fetching them.
+
+        Args:
+            source: Optional source name to restrict the count to
+
+        Returns:
+            Number of future events
+        """
+        return sum(
+            self.conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+            for sql, params in self._future_events_queries(source)
+        )
+
+    def get_future_events(self, source: Optional[str] = None) -> List[Dict]:
         """
-        Retrieve all events with dates in the future or no date specified.
+        Retrieve all events from today onwards or with no date specified.
+
+        Args:
+            source: Optional source name to restrict the results to
 
         Returns:
             List of event dictionaries
         """
-        now = datetime.now().isoformat()
+        events = list(self.iter_future_events(source))
+        logger.info(f"Retrieved {len(events)} future events from database")
+        return events
+
+    def query_events(self, from_date: Optional[str] = None, to_date: Optional[str] = None,
+                     source: Optional[str] = None, tag: Optional[str] = None,
+                     limit: int = 100, cursor: Optional[str] = None) -> Dict:
+        """
+        Page through dated events in a date window, using keyset pagination.
 
-        self.cursor.execute("""
-            SELECT id, title, start_date, end_date, location, 
-                   url, image_url, source, tags, scraped_at
+        Results are ordered by (start_day, start_date, rowid), which matches
+        the indexes, so each page is an index range scan no matter how deep
+        into the results it is.
+
+        Args:
+            from_date: First day (YYYY-MM-DD), defaults to today
+            to_date: Optional last day (YYYY-MM-DD), inclusive
+            source: Optional source name (without one, linked duplicates are collapsed)
+            tag: Optional tag the events must have
+            limit: Maximum number of events in the page
+            cursor: next_cursor value from the previous page
+
+        Returns:
+            Dictionary with 'events' and 'next_cursor' (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        clauses = ["start_day >= ?"]
+        params = [from_date or date.today().isoformat()]
+
+        if to_date:
+            clauses.append("start_day <= ?")
+            params.append(to_date)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        else:
+            clauses.append("canonical_id IS NULL")
+        if tag:
+            clauses.append("""EXISTS (
+                SELECT 1 FROM event_tags
+                WHERE event_tags.event_id = events.id
+                  AND event_tags.tag_id = (SELECT id FROM tags WHERE name = ?)
+            )""")
+            params.append(tag)
+        if cursor:
+            clauses.append("(start_day, start_date, rowid) > (?, ?, ?)")
+            params.extend(self._decode_cursor(cursor))
+
+        rows = self.conn.execute(f"""
+            SELECT rowid AS row_id, start_day, {EVENT_COLUMNS}
             FROM events
-            WHERE start_date IS NULL OR start_date >= ?
-            ORDER BY start_date ASC
-        """, (now,))
+            WHERE {' AND '.join(clauses)}
+            ORDER BY start_day ASC, start_date ASC, rowid ASC
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self._encode_cursor(last['start_day'], last['start_date'], last['row_id'])
 
         events = []
-        for row in self.cursor.fetchall():
-            event = dict(row)
-            # Parse tags back to list
-            if event['tags']:
-                try:
-                    event['tags'] = json.loads(event['tags'])
-                except json.JSONDecodeError:
-                    event['tags'] = []
+        for row in rows:
+            event = self._row_to_event(row)
+            del event['row_id'], event['start_day']
             events.append(event)
 
-        logger.info(f"Retrieved {len(events)} future events from database")
-        return events
+        return {'events': events, 'next_cursor': next_cursor}
+
+    def get_events_by_tag(self, tag: str, from_date: Optional[str] = None,
+                          to_date: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve the dated events with a tag in a date window.
+
+        Read through the event_tags index of the tag, so the cost follows
+        the number of events with that tag, not the size of the history.
+
+        Args:
+            tag: Tag name (exact)
+            from_date: First day (YYYY-MM-DD), defaults to today
+            to_date: Optional last day (YYYY-MM-DD), inclusive
+
+        Returns:
+            List of event dictionaries ordered by date (linked duplicates collapsed)
+        """
+        params = [tag, from_date or date.today().isoformat()]
+        to_clause = ""
+        if to_date:
+            to_clause = "AND events.start_day <= ?"
+            params.append(to_date)
+
+        rows = self.conn.execute(f"""
+            SELECT {QUALIFIED_EVENT_COLUMNS}
+            FROM tags
+            JOIN event_tags ON event_tags.tag_id = tags.id
+            JOIN events ON events.id = event_tags.event_id
+            WHERE tags.name = ? AND events.start_day >= ? {to_clause}
+              AND events.canonical_id IS NULL
+            ORDER BY events.start_day ASC, events.start_date ASC
+        """, params).fetchall()
+        return [self._row_to_event(row) for row in rows]
+
+    def get_tag_counts(self, from_date: Optional[str] = None, to_date: Optional[str] = None,
+                       source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Count events per tag in a date window (tag facets), in one SQL aggregate.
+
+        Args:
+            from_date: First day (YYYY-MM-DD), defaults to today
+            to_date: Optional last day (YYYY-MM-DD), inclusive
+            source: Optional source name (without one, linked duplicates are collapsed)
+
+        Returns:
+            {tag: number of events}, most used tags first
+        """
+        clauses = ["events.start_day >= ?"]
+        params = [from_date or date.today().isoformat()]
+        if to_date:
+            clauses.append("events.start_day <= ?")
+            params.append(to_date)
+        if source:
+            clauses.append("events.source = ?")
+            params.append(source)
+        else:
+            clauses.append("events.canonical_id IS NULL")
+
+        # CROSS JOIN fixes the loop order: the start_day range of events
+        # outermost, then each event's tags by primary key
+        rows = self.conn.execute(f"""
+            SELECT tags.name, COUNT(*) AS events
+            FROM events
+            CROSS JOIN event_tags ON event_tags.event_id = events.id
+            CROSS JOIN tags ON tags.id = event_tags.tag_id
+            WHERE {' AND '.join(clauses)}
+            GROUP BY tags.id
+            ORDER BY events DESC, tags.name ASC
+        """, params).fetchall()
+        return {row['name']: row['events'] for row in rows}
+
+    def search(self, query: str, from_date: Optional[str] = None, to_date: Optional[str] = None,
+               source: Optional[str] = None, limit: int = 50) -> Dict:
+        """
+        Full-text search over event titles, locations and tags.
+
+        Every word of the query must match, as a prefix ("teat aveir" finds
+        "Teatro Aveirense"), accents ignored. Results are ranked with bm25,
+        title matches weighing most (FTS_WEIGHTS), then by date. The date
+        window is also matched against the months' period tokens, so past
+        history never has to be read for a search of upcoming events.
+
+        Args:
+            query: Words typed by the user (FTS5 operators are not interpreted)
+            from_date: First day (YYYY-MM-DD), defaults to today
+            to_date: Optional last day (YYYY-MM-DD), inclusive
+            source: Optional source name (without one, linked duplicates are collapsed)
+            limit: Maximum number of events
+
+        Returns:
+            Dictionary with the 'query' and the matching 'events'
+        """
+        words = SEARCH_WORD.findall(query or '')
+        if not words:
+            return {'query': query, 'events': []}
+        from_date = from_date or date.today().isoformat()
+        match = ' AND '.join(f'{{title location tags}} : "{word}"*' for word in words)
+        periods = self._search_periods(from_date, to_date)
+        if periods is not None:
+            match += ' AND (' + ' OR '.join(f'period : {period}' for period in periods) + ')'
+
+        clauses = ["events_fts MATCH ?", "events.start_day >= ?"]
+        params = [match, from_date]
+        if to_date:
+            clauses.append("events.start_day <= ?")
+            params.append(to_date)
+        if source:
+            clauses.append("events.source = ?")
+            params.append(source)
+        else:
+            clauses.append("events.canonical_id IS NULL")
+
+        rows = self.conn.execute(f"""
+            SELECT {QUALIFIED_EVENT_COLUMNS}
+            FROM events_fts
+            JOIN events ON events.rowid = events_fts.rowid
+            WHERE {' AND '.join(clauses)}
+            ORDER BY bm25(events_fts, {', '.join(map(str, FTS_WEIGHTS))}), events.start_day
+            LIMIT ?
+        """, params + [limit]).fetchall()
+
+        return {'query': query, 'events': [self._row_to_event(row) for row in rows]}
+
+    def _search_periods(self, from_date: str, to_date: Optional[str]) -> Optional[List[str]]:
+        """
+        Period tokens covering the months of a search window.
+
+        Months of partial years are listed one by one ("m202610"), whole
+        years as one prefix ("m2027*"). The window is first clipped to the
+        stored date range.
+
+        Returns:
+            The tokens, or None when the window covers every stored event
+            (or can't be parsed) and needs no narrowing
+        """
+        # Two subqueries, so both ends are read from the start_day index
+        first, last = self.conn.execute(
+            "SELECT (SELECT MIN(start_day) FROM events), (SELECT MAX(start_day) FROM events)"
+        ).fetchone()
+        if not first or from_date <= first and (not to_date or to_date >= last):
+            return None
+        start, end = max(from_date, first), min(to_date or last, last)
+        try:
+            year, month = int(start[:4]), int(start[5:7])
+            last_year, last_month = int(end[:4]), int(end[5:7])
+        except ValueError:
+            return None
+
+        periods = []
+        while (year, month) <= (last_year, last_month):
+            if month == 1 and (year < last_year or last_month == 12):
+                periods.append(f"m{year:04d}*")
+                year += 1
+                continue
+            periods.append(f"m{year:04d}{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return periods or None
+
+    @staticmethod
+    def _encode_cursor(start_day: str, start_date: str, row_id: int) -> str:
+        """Encode a pagination position as an opaque URL-safe string."""
+        raw = json.dumps([start_day, start_date, row_id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List:
+        """
+        Decode a cursor produced by _encode_cursor().
+
+        Raises:
+            ValueError: If it isn't [YYYY-MM-DD day, start_date of that day, rowid]
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            start_day, start_date, row_id = json.loads(raw)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        valid = (
+            isinstance(start_day, str) and ISO_DAY.fullmatch(start_day)
+            and isinstance(start_date, str) and EventDatabase.normalize_day(start_date) == start_day
+            and isinstance(row_id, int) and not isinstance(row_id, bool)
+        )
+        if not valid:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return [start_day, start_date, row_id]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Read a value from the meta key/value table."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """Store a value in the meta key/value table."""
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO meta (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """, (key, value))
+            if not self._batch_depth:
+                self.conn.commit()
 
-    def export_to_json(self, output_path: Optional[Path] = None) -> Path:
+    def compute_export_hash(self, compact: bool = False) -> str:
+        """
+        Hash the exported event payload, ignoring volatile fields like scraped_at.
+
+        Args:
+            compact: Output format, part of the hash so switching format rewrites the file
+
+        Returns:
+            SHA256 hex digest of the future events
+        """
+        return self._hash_events(self.iter_future_events(), b'compact' if compact else b'indent')
+
+    @staticmethod
+    def _hash_events(events: Iterable[Dict], salt: bytes = b'') -> str:
+        """SHA256 over event dicts, ignoring VOLATILE_FIELDS."""
+        digest = hashlib.sha256(salt)
+        for event in events:
+            stable = {k: v for k, v in event.items() if k not in VOLATILE_FIELDS}
+            digest.update(json.dumps(stable, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    @staticmethod
+    def _atomic_write(path: Path, write):
+        """
+        Write a file through a temporary sibling and os.replace() it into place.
+
+        Args:
+            path: Destination file
+            write: Callable receiving the open text file; its result is returned
+
+        Returns:
+            Whatever write() returned
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                result = write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return result
+
+    def export_to_json(self, output_path: Optional[Path] = None, compact: bool = False,
+                       force: bool = False) -> Path:
         """
         Export future events to JSON file for frontend consumption.
 
+        Events are streamed from the database into a temporary file next to
+        the destination, which then atomically replaces it, so readers never
+        see a partially written file and memory use doesn't grow with the
+        number of events.
+
+        The file is left untouched when the event content hash matches the
+        previous export; last_export_changed tells which case happened.
+
         Args:
             output_path: Optional custom output path
+            compact: Write without indentation or extra whitespace
+            force: Rewrite the file even if no event changed
 
         Returns:
             Path to the exported JSON file
@@ -172,46 +1110,229 @@ class EventDatabase:
         output_path = output_path or JSON_PATH
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        events = self.get_future_events()
+        hash_key = f"export_hash:{output_path.name}"
+        content_hash = self.compute_export_hash(compact)
+        if not force and output_path.exists() and self.get_meta(hash_key) == content_hash:
+            self.last_export_changed = False
+            logger.info(f"Events unchanged since last export, keeping {output_path}")
+            return output_path
 
-        # Create JSON with metadata
-        data = {
+        with self._lock:
+            total = self._atomic_write(output_path, lambda f: self._write_events_json(f, compact))
+
+        self.set_meta(hash_key, content_hash)
+        self.last_export_changed = True
+        logger.info(f"Exported {total} events to {output_path}")
+        return output_path
+
+    def _write_events_json(self, f, compact: bool) -> int:
+        """
+        Write the export document to f one event at a time.
+
+        Produces the same document as json.dump(..., indent=2), or its
+        compact form when requested.
+
+        Returns:
+            Number of events written
+        """
+        if compact:
+            def dumps(value, level=0):
+                return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+            newline, pad, sep = '', '', ':'
+        else:
+            def dumps(value, level=0):
+                text = json.dumps(value, ensure_ascii=False, indent=2)
+                return text.replace('\n', '\n' + '  ' * level)
+            newline, pad, sep = '\n', '  ', ': '
+
+        total = self.count_future_events()
+        f.write('{' + newline)
+        f.write(f'{pad}"last_updated"{sep}{dumps(datetime.now().isoformat())},{newline}')
+        f.write(f'{pad}"total_events"{sep}{total},{newline}')
+        f.write(f'{pad}"events"{sep}[')
+
+        written = 0
+        for event in self.iter_future_events():
+            f.write((',' if written else '') + newline + pad * 2 + dumps(event, level=2))
+            written += 1
+
+        f.write((newline + pad if written else '') + ']' + newline + '}')
+        return written
+
+    def export_shards(self, output_dir: Optional[Path] = None, compact: bool = False) -> Dict:
+        """
+        Export future events as one JSON file per month plus a manifest.
+
+        Writes ``<output_dir>/YYYY-MM.json`` (and ``undated.json``) with the
+        same event objects as events.json, and ``manifest.json`` with the
+        count and content hash of each month, so the frontend can fetch only
+        the months it shows. An event whose end_date falls in a later month
+        is written to every month it covers, so it shows up whichever of
+        those months is loaded. Shards whose hash didn't change are not
+        rewritten, shards for months no longer exported are removed, and the
+        manifest is only rewritten when some month changed.
+
+        Args:
+            output_dir: Optional custom output directory
+            compact: Write without indentation or extra whitespace
+
+        Returns:
+            The manifest dictionary
+        """
+        output_dir = output_dir or SHARDS_DIR
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_NAME
+        indent = None if compact else 2
+        separators = (',', ':') if compact else None
+
+        previous = {}
+        if manifest_path.exists():
+            try:
+                previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring unreadable manifest: {manifest_path}")
+        previous_months = previous.get('months', {})
+
+        def shard_keys(event):
+            start = self.normalize_day(event['start_date'])
+            if not start:
+                return [UNDATED_SHARD]
+            end = self.normalize_day(event['end_date'])
+            if not (ISO_DAY.fullmatch(start) and end and ISO_DAY.fullmatch(end) and end > start):
+                return [start[:7]]
+            return self._months_between(start[:7], end[:7])
+
+        months = {}
+        sources = set()
+        next_event_date = None
+        total_events = 0
+        written = 0
+
+        def write_shard(key, events):
+            nonlocal written
+            entry = {
+                'file': f"{key}.json",
+                'count': len(events),
+                'hash': self._hash_events(events, b'compact' if compact else b'indent')
+            }
+            shard_path = output_dir / entry['file']
+            if previous_months.get(key, {}).get('hash') != entry['hash'] or not shard_path.exists():
+                data = {'month': key, 'total_events': len(events), 'events': events}
+                self._atomic_write(shard_path, lambda f: json.dump(
+                    data, f, ensure_ascii=False, indent=indent, separators=separators
+                ))
+                written += 1
+            months[key] = entry
+
+        with self._lock:
+            # Events arrive ordered by start day (undated first), so a month
+            # can be written as soon as an event starts after it
+            open_shards = {}
+            for event in self.iter_future_events():
+                keys = shard_keys(event)
+                total_events += 1
+                sources.add(event['source'])
+                if keys[0] != UNDATED_SHARD and next_event_date is None:
+                    next_event_date = event['start_date']
+
+                done = [
+                    key for key in open_shards
+                    if key == UNDATED_SHARD and keys[0] != UNDATED_SHARD
+                    or key != UNDATED_SHARD and key < keys[0]
+                ]
+                for key in sorted(done, key=lambda k: (k != UNDATED_SHARD, k)):
+                    write_shard(key, open_shards.pop(key))
+                for key in keys:
+                    open_shards.setdefault(key, []).append(event)
+
+            for key in sorted(open_shards, key=lambda k: (k != UNDATED_SHARD, k)):
+                write_shard(key, open_shards[key])
+
+        for key in previous_months.keys() - months.keys():
+            (output_dir / previous_months[key]['file']).unlink(missing_ok=True)
+
+        manifest = {
             'last_updated': datetime.now().isoformat(),
-            'total_events': len(events),
-            'events': events
+            'total_events': total_events,
+            'next_event_date': next_event_date,
+            'sources': sorted(sources),
+            'months': months
         }
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        unchanged = {k: v for k, v in previous.items() if k != 'last_updated'} == \
+            {k: v for k, v in manifest.items() if k != 'last_updated'}
+        if unchanged:
+            manifest['last_updated'] = previous['last_updated']
+        else:
+            self._atomic_write(manifest_path, lambda f: json.dump(
+                manifest, f, ensure_ascii=False, indent=indent, separators=separators
+            ))
 
-        logger.info(f"Exported {len(events)} events to {output_path}")
-        return output_path
+        logger.info(
+            f"Exported {len(months)} month shards to {output_dir} "
+            f"({written} rewritten, manifest {'unchanged' if unchanged else 'updated'})"
+        )
+        return manifest
 
-    def get_stats(self) -> Dict:
+    @staticmethod
+    def _months_between(first: str, last: str) -> List[str]:
         """
-        Get database statistics.
+        List the YYYY-MM months from first to last, both included.
+
+        Args:
+            first: First month, e.g. '2026-11'
+            last: Last month, e.g. '2027-02'
 
         Returns:
-            Dictionary with stats
+            Month keys in order
         """
-        self.cursor.execute("SELECT COUNT(*) as total FROM events")
-        total = self.cursor.fetchone()['total']
+        year, month = int(first[:4]), int(first[5:7])
+        months = []
+        while f"{year:04d}-{month:02d}" <= last:
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
 
+    def get_stats(self) -> Dict:
+        """
+        Get database statistics, computed in a single aggregate query.
+
+        Returns:
+            Dictionary with total/future counts (overall and per source),
+            the first/last event day stored and how many events are linked
+            duplicates; the overall future count leaves duplicates out, as
+            the export does
+        """
         self.cursor.execute("""
-            SELECT source, COUNT(*) as count 
-            FROM events 
+            SELECT source,
+                   COUNT(*) AS total,
+                   SUM(start_day IS NULL OR start_day >= ?) AS future,
+                   SUM((start_day IS NULL OR start_day >= ?) AND canonical_id IS NULL) AS future_canonical,
+                   COUNT(canonical_id) AS duplicates,
+                   MIN(start_day) AS first_day,
+                   MAX(start_day) AS last_day
+            FROM events
             GROUP BY source
-        """)
-        by_source = {row['source']: row['count'] for row in self.cursor.fetchall()}
+        """, (date.today().isoformat(),) * 2)
+        rows = self.cursor.fetchall()
+
+        first_days = [row['first_day'] for row in rows if row['first_day']]
+        last_days = [row['last_day'] for row in rows if row['last_day']]
 
         return {
-            'total_events': total,
-            'by_source': by_source,
-            'future_events': len(self.get_future_events())
+            'total_events': sum(row['total'] for row in rows),
+            'by_source': {row['source']: row['total'] for row in rows},
+            'future_events': sum(row['future_canonical'] for row in rows),
+            'future_by_source': {row['source']: row['future'] for row in rows},
+            'duplicates': sum(row['duplicates'] for row in rows),
+            'first_date': min(first_days) if first_days else None,
+            'last_date': max(last_days) if last_days else None
         }
 
     def close(self):
         """Close database connection."""
+        if self._readers:
+            self._readers.close()
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed")
@@ -223,3 +1344,59 @@ class EventDatabase:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.close()
+
+
+def _new_source_diff() -> Dict:
+    return {'added': [], 'changed': [], 'unchanged': 0, 'seen': set()}
+
+
+def _merge_diff(target: Dict, diff: Dict):
+    """Add the per-source diff entries of diff to target."""
+    for source, tracked in diff.items():
+        merged = target.setdefault(source, _new_source_diff())
+        merged['added'].extend(tracked['added'])
+        merged['changed'].extend(tracked['changed'])
+        merged['unchanged'] += tracked['unchanged']
+        merged['seen'] |= tracked['seen']
+
+
+def _diff_entry(event) -> Dict:
+    return {'id': event['id'], 'title': event['title'], 'url': event['url'], 'start_date': event['start_date']}
+
+
+class ReadOnlyDatabasePool:
+    """Bounded pool of read-only EventDatabase connections shared by reader threads."""
+
+    def __init__(self, db_path, size=4):
+        """
+        Args:
+            db_path: Path of events.db
+            size: Maximum number of open connections
+        """
+        self.db_path = Path(db_path)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a read-only EventDatabase, blocking while all are in use."""
+        self._slots.acquire()
+        try:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                db = EventDatabase(self.db_path, read_only=True)
+            try:
+                yield db
+            finally:
+                self._idle.put(db)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,198 @@
+"""
+Core date parsing module.
+Turns the day/month strings shown on the agenda pages ("02 fevereiro",
+"13-14 março", "26 abril - 03 maio", "22 – jan") into YYYY-MM-DD dates,
+with one month table and one forward-only year rule for every source.
+"""
+
+import logging
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Month names and abbreviations (Portuguese and English) -> month number
+MONTHS = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12,
+    'feb': 2, 'apr': 4, 'may': 5, 'aug': 8, 'sep': 9, 'oct': 10, 'dec': 12,
+}
+
+# Agenda pages only list upcoming events, so a day/month without a year is
+# the first one on or after the reference date minus this many days (events
+# that started a little earlier may still be listed, e.g. "15 dez" read on
+# 5 January; "15 jan" read in December is next January)
+ROLLOVER_GRACE_DAYS = 31
+
+# Separator between day and month: spaces, dashes (any kind), slashes, "de"
+_SEP = r'(?:\s*[-–—/]\s*|\s+)(?:de\s+)?'
+
+# "26 abril - 03 maio"
+_RANGE_TWO_MONTHS = re.compile(r'(\d{1,2})' + _SEP + r'([a-zç]+)\s*[-–—]\s*(\d{1,2})' + _SEP + r'([a-zç]+)')
+# "13-14 março"
+_RANGE_ONE_MONTH = re.compile(r'(\d{1,2})\s*[-–—]\s*(\d{1,2})' + _SEP + r'([a-zç]+)')
+# "02 fevereiro", "22 – jan"
+_SINGLE = re.compile(r'(\d{1,2})' + _SEP + r'([a-zç]+)')
+_SPACES = re.compile(r'\s+')
+
+_reference = None
+
+
+def set_reference_date(today: Optional[date] = None) -> date:
+    """
+    Fix the "today" used for year inference for the rest of the run.
+
+    Called once at the start of a run so every event is dated against the
+    same day, even when a run crosses midnight.
+
+    Args:
+        today: Reference date (default: date.today())
+
+    Returns:
+        The reference date now in use
+    """
+    global _reference
+    _reference = today or date.today()
+    return _reference
+
+
+def reference_date() -> date:
+    """Return the run's reference date, fixing it on first use."""
+    return _reference or set_reference_date()
+
+
+def normalize_date_text(text: str) -> str:
+    """Lowercase, drop dots and collapse whitespace (the cache key)."""
+    return _SPACES.sub(' ', text.lower().replace('.', ' ')).strip()
+
+
+def infer_year(day: int, month: int, today: date) -> int:
+    """
+    Pick the year of a day/month shown without one (rolling forward only).
+
+    Args:
+        day: Day of the month
+        month: Month number
+        today: Reference date
+
+    Returns:
+        Year of the earliest such date on or after today minus
+        ROLLOVER_GRACE_DAYS
+
+    Raises:
+        ValueError: The day doesn't exist in that month ("31 fevereiro")
+    """
+    earliest = today - timedelta(days=ROLLOVER_GRACE_DAYS)
+    # 29 February may be up to four years ahead
+    for year in range(earliest.year, earliest.year + 5):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            continue
+        if candidate >= earliest:
+            return year
+    raise ValueError(f"day {day} is out of range for month {month}")
+
+
+def _make_date(day: str, month_name: str, today: date) -> Optional[date]:
+    month = MONTHS.get(month_name)
+    if not month:
+        return None
+    return date(infer_year(int(day), month, today), month, int(day))
+
+
+def _make_start(day: str, month_name: str, end: date) -> Optional[date]:
+    """Latest day/month on or before a range's end ("20 dez - 05 jan": December before)."""
+    month = MONTHS.get(month_name)
+    if not month:
+        return None
+    # 29 February may be up to four years back
+    for year in range(end.year, end.year - 5, -1):
+        try:
+            candidate = date(year, month, int(day))
+        except ValueError:
+            continue
+        if candidate <= end:
+            return candidate
+    raise ValueError(f"day {day} is out of range for month {month}")
+
+
+def _make_range(d1: str, m1: str, d2: str, m2: str, today: date) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Date a range from its end, so a run that is still on (or started last
+    year) isn't moved a year ahead.
+    """
+    end = _make_date(d2, m2, today)
+    if end is None:
+        return _make_date(d1, m1, today), None
+    return _make_start(d1, m1, end), end
+
+
+@lru_cache(maxsize=4096)
+def _parse_normalized(text: str, today: date) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        match = _RANGE_TWO_MONTHS.search(text)
+        if match:
+            d1, m1, d2, m2 = match.groups()
+            start, end = _make_range(d1, m1, d2, m2, today)
+        else:
+            match = _RANGE_ONE_MONTH.search(text)
+            if match:
+                d1, d2, m1 = match.groups()
+                start, end = _make_range(d1, m1, d2, m1, today)
+            else:
+                match = _SINGLE.search(text)
+                if not match:
+                    return None, None
+                start, end = _make_date(*match.groups(), today), None
+    except ValueError as e:
+        logger.warning(f"Date parsing failed for '{text}': {e}")
+        return None, None
+
+    if start is None:
+        return None, None
+    return start.isoformat(), end.isoformat() if end else None
+
+
+def parse_date_range(text: str, today: Optional[date] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Parse an agenda date string into start and end dates.
+
+    Args:
+        text: Date text, e.g. "26 abril - 03 maio", "13-14 março" or "02 fevereiro"
+        today: Reference date (default: the run's reference_date())
+
+    Returns:
+        (start_date, end_date) as YYYY-MM-DD strings; end_date is None for
+        single days and both are None when the text isn't a date
+    """
+    if not text:
+        return None, None
+    return _parse_normalized(normalize_date_text(text), today or reference_date())
+
+
+def parse_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """Parse an agenda date string and return only its start date (YYYY-MM-DD)."""
+    return parse_date_range(text, today)[0]
+
+
+def parse_date_ranges(texts: Iterable[str], today: Optional[date] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Parse many date strings against the same reference date.
+
+    Args:
+        texts: Date texts (repeated strings are served from the cache)
+        today: Reference date (default: the run's reference_date())
+
+    Returns:
+        One (start_date, end_date) tuple per input text
+    """
+    today = today or reference_date()
+    return [
+        _parse_normalized(normalize_date_text(text), today) if text else (None, None)
+        for text in texts
+    ]
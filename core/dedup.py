@@ -0,0 +1,183 @@
+"""
+Core duplicate detection module.
+Finds the same show listed by several sources ("Território IX - Estúdios
+Victor Córdon" from Teatro Aveirense and "Território IX" from AveiroOn on
+the same day). Events are blocked by start day and normalized title
+tokens, so only events sharing a day and a not-too-common token are ever
+compared, and each candidate pair is scored with a set similarity over
+the title tokens. Matches are linked best-first into clusters holding at
+most one event per source (so "Festival END" can't chain every "... -
+Festival END" session together), whose canonical event is the one seen
+first.
+"""
+
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about which show it is (Portuguese and English)
+STOPWORDS = frozenset({
+    'a', 'o', 'as', 'os', 'ao', 'aos', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na',
+    'nos', 'nas', 'com', 'para', 'por', 'um', 'uma', 'the', 'and', 'of', 'in', 'at',
+})
+
+# Minimum token similarity for two events to be the same show
+SIMILARITY_THRESHOLD = 0.8
+
+# A title may be a shortened form of another ("Território IX") as long as
+# the shorter one still has this many tokens
+MIN_CONTAINED_TOKENS = 2
+
+# Tokens shared by more events of the same day than this are too common
+# ("concerto", "festival") to form a block on their own
+MAX_BLOCK_SIZE = 50
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def title_words(title: str) -> List[str]:
+    """
+    Normalize a title into its significant words, in order.
+
+    Args:
+        title: Event title
+
+    Returns:
+        Lowercase, accent-free words without stopwords
+    """
+    text = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode('ascii')
+    return [word for word in _TOKEN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    """Set of title_words(), as compared by similarity()."""
+    return frozenset(title_words(title))
+
+
+def _leads_with(a: Dict, b: Dict) -> bool:
+    """Whether the shorter title is the start of the longer one ("Festival END - Encontros ...")."""
+    words_a, words_b = title_words(a['title']), title_words(b['title'])
+    shorter, longer = sorted((words_a, words_b), key=len)
+    return longer[:len(shorter)] == shorter
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Score how alike two token sets are.
+
+    Uses containment (shared tokens over the smaller set) so a shortened
+    title still matches the full one, falling back to Jaccard when the
+    smaller set is too short for containment to mean much.
+
+    Returns:
+        Score between 0 and 1
+    """
+    shared = len(a & b)
+    if not shared:
+        return 0.0
+    smaller = min(len(a), len(b))
+    if smaller >= MIN_CONTAINED_TOKENS:
+        return shared / smaller
+    return shared / len(a | b)
+
+
+def find_duplicates(events: Iterable[Dict], threshold: float = SIMILARITY_THRESHOLD) -> Tuple[Dict[str, str], Dict]:
+    """
+    Link events of different sources that are the same show on the same day.
+
+    Args:
+        events: Dicts with 'id', 'title', 'source', 'start_day' and
+            optionally 'first_seen'; undated events are ignored
+        threshold: Minimum similarity() of a duplicate pair
+
+    Returns:
+        ({duplicate id: canonical id}, stats) - canonical events are not in
+        the mapping; stats has 'events', 'comparisons', 'links' and
+        'clusters'
+    """
+    by_day = defaultdict(list)
+    for event in events:
+        if event.get('start_day'):
+            by_day[event['start_day']].append(event)
+
+    parent = {}
+    sources = {}
+
+    def find(event_id):
+        root = event_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        # Path compression
+        while event_id != root:
+            parent[event_id], event_id = root, parent[event_id]
+        return root
+
+    comparisons = 0
+    matches = []
+    total = 0
+
+    for day_events in by_day.values():
+        total += len(day_events)
+        tokens = [title_tokens(event['title']) for event in day_events]
+
+        postings = defaultdict(list)
+        for i, event_tokens in enumerate(tokens):
+            for token in event_tokens:
+                postings[token].append(i)
+
+        for i, event in enumerate(day_events):
+            candidates = set()
+            for token in tokens[i]:
+                posting = postings[token]
+                if len(posting) <= MAX_BLOCK_SIZE:
+                    candidates.update(j for j in posting if j > i)
+
+            for j in candidates:
+                other = day_events[j]
+                if other['source'] == event['source']:
+                    continue
+                comparisons += 1
+                score = similarity(tokens[i], tokens[j])
+                if score >= threshold:
+                    # Ties (several titles containing a short one) go to the title
+                    # that starts with it, then to the closest one
+                    jaccard = len(tokens[i] & tokens[j]) / len(tokens[i] | tokens[j])
+                    matches.append((score, _leads_with(event, other), jaccard, event, other))
+
+    links = 0
+    matches.sort(key=lambda match: match[:3], reverse=True)
+    for _, _, _, event, other in matches:
+        for member in (event, other):
+            if member['id'] not in parent:
+                parent[member['id']] = member['id']
+                sources[member['id']] = {member['source']}
+        a, b = find(event['id']), find(other['id'])
+        if a != b and not sources[a] & sources[b]:
+            parent[b] = a
+            sources[a] |= sources.pop(b)
+            links += 1
+
+    # Canonical event of each cluster: seen first, then lowest id (stable across runs)
+    seen = {}
+    for day_events in by_day.values():
+        for event in day_events:
+            if event['id'] in parent:
+                first_seen = event.get('first_seen')
+                seen[event['id']] = (first_seen is None, first_seen or '', event['id'])
+
+    clusters = defaultdict(list)
+    for event_id in seen:
+        clusters[find(event_id)].append(event_id)
+    clusters = {root: members for root, members in clusters.items() if len(members) > 1}
+
+    duplicates = {}
+    for members in clusters.values():
+        canonical = min(members, key=seen.__getitem__)
+        duplicates.update((member, canonical) for member in members if member != canonical)
+
+    stats = {'events': total, 'comparisons': comparisons, 'links': links, 'clusters': len(clusters)}
+    return duplicates, stats
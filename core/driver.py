@@ -6,18 +6,73 @@ Configures Chrome in headless mode with stealth options to avoid bot detection.
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from contextlib import contextmanager
 import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Human-like User Agent (shared with the plain HTTP fetcher)
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+)
 
-def initialize_driver():
+# Resources the scrapers never read: they only look at DOM attributes
+# (src, data-img, data-lazy-src), so image/media/font bytes and trackers
+# are pure page-load overhead. Scrapers can re-enable patterns with
+# ALLOWED_RESOURCES.
+BLOCKED_EXTENSIONS = [
+    # Images
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # Media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+BLOCKED_URL_PATTERNS = [
+    # Extensions also with a query string: cache-busted assets ("x.jpg?v=3",
+    # common on WordPress) don't end with the extension
+    *(variant for pattern in BLOCKED_EXTENSIONS for variant in (pattern, f"{pattern}?*")),
+    # Analytics / trackers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*clarity.ms*",
+]
+
+# Bytes transferred for the current page (document + resources), from the Resource Timing API
+_TRANSFER_BYTES_JS = """
+    const nav = performance.getEntriesByType('navigation')[0];
+    let total = nav ? nav.transferSize : 0;
+    for (const r of performance.getEntriesByType('resource')) total += r.transferSize || 0;
+    return total;
+"""
+
+
+def initialize_driver(lean: bool = True, user_data_dir: Optional[str] = None,
+                      debugger_address: Optional[str] = None):
     """
     Initialize Chrome WebDriver with stealth configuration for Linux containers.
 
+    Args:
+        lean: Block images, media, fonts and trackers (see BLOCKED_URL_PATTERNS)
+        user_data_dir: Persistent Chrome profile directory, so the HTTP disk
+            cache survives between runs
+        debugger_address: host:port of an already running Chrome started with
+            --remote-debugging-port; the driver attaches to it instead of
+            launching a new browser, and close_driver() only detaches
+
     Returns:
         webdriver.Chrome: Configured Chrome WebDriver instance
     """
+    if debugger_address:
+        return _attach_driver(debugger_address, lean)
+
     logger.info("Initializing Chrome WebDriver...")
 
     chrome_options = Options()
@@ -38,17 +93,19 @@ def initialize_driver():
     chrome_options.add_experimental_option("useAutomationExtension", False)
 
     # Human-like User Agent
-    user_agent = (
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-    )
-    chrome_options.add_argument(f"user-agent={user_agent}")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
 
     # Additional privacy options
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-popup-blocking")
     chrome_options.add_argument("--disable-notifications")
 
+    # Persistent profile (keeps the disk cache warm between runs)
+    if user_data_dir:
+        Path(user_data_dir).mkdir(parents=True, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={Path(user_data_dir).resolve()}")
+        logger.info(f"Using persistent Chrome profile: {user_data_dir}")
+
     # Initialize driver
     driver = webdriver.Chrome(options=chrome_options)
 
@@ -58,20 +115,229 @@ def initialize_driver():
     # Set page load timeout
     driver.set_page_load_timeout(30)
 
+    if lean:
+        block_resources(driver)
+
     logger.info("Chrome WebDriver initialized successfully")
     return driver
 
 
+def _attach_driver(debugger_address: str, lean: bool):
+    """Attach a WebDriver session to an already running Chrome."""
+    logger.info(f"Attaching to running Chrome at {debugger_address}...")
+
+    # Launch-time switches (headless, stealth, user agent) belong to the
+    # running browser; chromedriver rejects most of them when attaching
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(30)
+    # close_driver() must leave this browser running
+    driver.attached_session = True
+
+    if lean:
+        block_resources(driver)
+
+    logger.info("Attached to running Chrome successfully")
+    return driver
+
+
+def block_resources(driver, allow=()) -> bool:
+    """
+    Block heavy or tracking resources through the Chrome DevTools Protocol.
+
+    Args:
+        driver: WebDriver instance
+        allow: Patterns from BLOCKED_URL_PATTERNS to let through for this
+            scraper ("*.svg" also lets "*.svg?*" through)
+
+    Returns:
+        True if the block list was applied
+    """
+    allowed = set(allow) | {f"{pattern}?*" for pattern in allow}
+    patterns = [p for p in BLOCKED_URL_PATTERNS if p not in allowed]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logger.warning(f"Could not block resources via CDP: {e}")
+        return False
+
+    logger.debug(f"Blocking {len(patterns)} URL patterns ({len(allowed)} allowed)")
+    return True
+
+
+def page_transfer_bytes(driver) -> int:
+    """
+    Bytes transferred to load the current page (document plus resources).
+
+    Cross-origin resources without Timing-Allow-Origin report 0, so this is
+    a lower bound.
+
+    Args:
+        driver: WebDriver instance
+
+    Returns:
+        Number of bytes, or 0 if it can't be measured
+    """
+    try:
+        return int(driver.execute_script(_TRANSFER_BYTES_JS) or 0)
+    except Exception as e:
+        logger.debug(f"Could not measure transfer size: {e}")
+        return 0
+
+
 def close_driver(driver):
     """
-    Safely close the WebDriver instance.
+    Safely close the WebDriver instance (or detach from an attached browser).
 
     Args:
         driver: WebDriver instance to close
     """
     if driver:
         try:
-            driver.quit()
-            logger.info("Chrome WebDriver closed successfully")
+            if getattr(driver, 'attached_session', False):
+                # Stop only chromedriver; the shared browser keeps running warm
+                driver.service.stop()
+                logger.info("Detached from running Chrome")
+            else:
+                driver.quit()
+                logger.info("Chrome WebDriver closed successfully")
         except Exception as e:
             logger.error(f"Error closing driver: {e}")
+
+
+# Snapshot of the page used by wait_for_ready(): item count, number of
+# resources fetched so far, document.readyState and images still waiting
+# for a real (non data:) URL in one of the given attributes
+_READY_SNAPSHOT_JS = """
+    const selector = arguments[0], attrs = arguments[1];
+    const items = document.querySelectorAll(selector);
+    let pendingImages = 0;
+    if (attrs.length) {
+        for (const item of items) {
+            for (const img of item.querySelectorAll('img')) {
+                const loaded = attrs.some(a => {
+                    const v = img.getAttribute(a);
+                    return v && !v.startsWith('data:');
+                });
+                if (!loaded) pendingImages++;
+            }
+        }
+    }
+    return [items.length, performance.getEntriesByType('resource').length,
+            document.readyState, pendingImages];
+"""
+
+
+def wait_for_ready(driver, css_selector: str, timeout: float = 5.0, stable_for: float = 0.5,
+                   network_idle: bool = False, lazy_image_attrs=(), poll_frequency: float = 0.1) -> float:
+    """
+    Wait until the page content is settled instead of sleeping a fixed time.
+
+    The page is ready when the number of elements matching css_selector is
+    non-zero and hasn't changed for stable_for seconds. Optionally it also
+    waits for the network to go quiet (no new resources fetched and the
+    document fully loaded) and for lazy images inside the items to get a
+    real URL in one of lazy_image_attrs.
+
+    Args:
+        driver: WebDriver instance
+        css_selector: Selector of the items the scraper will read
+        timeout: Maximum seconds to wait (per scraper)
+        stable_for: Seconds the snapshot must stay unchanged
+        network_idle: Also wait for network activity to stop
+        lazy_image_attrs: Image attributes that must hold a URL (e.g. 'data-lazy-src', 'src')
+        poll_frequency: Seconds between checks
+
+    Returns:
+        Seconds actually waited
+    """
+    started = time.monotonic()
+    state = {'snapshot': None, 'since': started}
+
+    def is_ready(d):
+        count, resources, ready_state, pending_images = d.execute_script(
+            _READY_SNAPSHOT_JS, css_selector, list(lazy_image_attrs)
+        )
+        snapshot = (count, resources if network_idle else None, pending_images)
+        now = time.monotonic()
+        if snapshot != state['snapshot']:
+            state['snapshot'] = snapshot
+            state['since'] = now
+            return False
+        if network_idle and ready_state != 'complete':
+            return False
+        return count > 0 and not pending_images and now - state['since'] >= stable_for
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(is_ready)
+        waited = time.monotonic() - started
+        logger.info(f"Page ready after {waited:.2f}s ({css_selector})")
+    except TimeoutException:
+        waited = time.monotonic() - started
+        logger.warning(f"Page not settled after {waited:.2f}s ({css_selector}), continuing anyway")
+
+    return waited
+
+
+class DriverPool:
+    """
+    Bounded pool of WebDriver instances shared between scraper threads.
+
+    Drivers are created lazily (up to ``size``) the first time they are
+    needed and handed back to the pool when a scraper finishes, so a run
+    never starts more Chrome processes than it actually uses.
+    """
+
+    def __init__(self, size: int = 1, factory=initialize_driver):
+        """
+        Args:
+            size: Maximum number of concurrent WebDriver instances
+            factory: Callable that creates a new WebDriver
+        """
+        self.size = max(1, size)
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a WebDriver from the pool, blocking while all are in use.
+
+        Yields:
+            webdriver.Chrome: A driver owned by the caller until the block exits
+        """
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._factory()
+                with self._lock:
+                    self._drivers.append(driver)
+            try:
+                yield driver
+            finally:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every WebDriver created by the pool."""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            close_driver(driver)
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
@@ -0,0 +1,276 @@
+"""
+Core HTTP fetcher module.
+Fetches static pages with a pooled requests.Session so scrapers that don't
+need JavaScript can skip starting a headless Chrome, and keeps a local page
+cache (data/cache/) so unchanged agendas are neither re-downloaded nor
+re-parsed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.driver import USER_AGENT
+from core.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+# Scraper fetch modes (declared per scraper module as FETCH_MODE)
+FETCH_HTTP = "http"
+FETCH_BROWSER = "browser"
+
+REQUEST_TIMEOUT = 20
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
+
+_session = None
+_session_lock = threading.Lock()
+
+# Bytes downloaded by PageCache.fetch() on the current thread (one scraper per thread)
+_transfer = threading.local()
+
+# Pages found unchanged (scraper skipped them) on the current thread
+_unchanged = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared HTTP session, creating it on first use.
+
+    The session keeps connections alive between requests and accepts
+    gzip/deflate responses.
+
+    Returns:
+        requests.Session: Shared session instance
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "pt-PT,pt;q=0.9,en;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            })
+            _session = session
+            logger.info("HTTP session initialized")
+        return _session
+
+
+def _decode(response: requests.Response) -> str:
+    """Return the response body as text."""
+    # Servers that omit the charset would otherwise be decoded as ISO-8859-1
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = response.apparent_encoding
+    return response.text
+
+
+def _count_transfer(response: requests.Response) -> int:
+    """Add a response's size to the current thread's byte counter and return it."""
+    # Content-Length is the compressed size when the server used gzip
+    size = int(response.headers.get("Content-Length") or len(response.content))
+    _transfer.bytes = transfer_count() + size
+    return size
+
+
+def reset_transfer_count():
+    """Reset the bytes counter of the current thread."""
+    _transfer.bytes = 0
+
+
+def transfer_count() -> int:
+    """Bytes downloaded by PageCache.fetch() on the current thread since the last reset."""
+    return getattr(_transfer, "bytes", 0)
+
+
+def reset_unchanged_pages():
+    """Reset the unchanged-pages counter of the current thread."""
+    _unchanged.pages = 0
+
+
+def unchanged_pages() -> int:
+    """Pages reported unchanged on the current thread since the last reset."""
+    return getattr(_unchanged, "pages", 0)
+
+
+class CachedPage:
+    """A fetched page plus whether it changed since it was last scraped."""
+
+    def __init__(self, url: str, text: str, content_hash: str, changed: bool, not_modified: bool):
+        self.url = url
+        self.text = text
+        self.content_hash = content_hash
+        # False when this exact content was already scraped successfully
+        self.changed = changed
+        # True when the server answered 304 Not Modified
+        self.not_modified = not_modified
+
+
+class PageCache:
+    """
+    On-disk cache of agenda pages, keyed by URL.
+
+    For each URL it keeps the last body, its ETag / Last-Modified headers
+    (sent back as If-None-Match / If-Modified-Since) and two content hashes:
+    the last one fetched and the last one a scraper finished processing.
+    A page is only reported as changed when those differ.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = cache_dir
+        # Treat every page as changed (still refreshes the cache)
+        self.refresh = False
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()[:24]
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.html"
+
+    def _load(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            entry = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        entry['has_body'] = body_path.exists()
+        return entry
+
+    def _save(self, url: str, entry: Dict, text: Optional[str] = None):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        if text is not None:
+            self._write(body_path, text)
+        entry = {k: v for k, v in entry.items() if k != 'has_body'}
+        self._write(meta_path, json.dumps(entry, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _write(path: Path, text: str):
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def fetch(self, url: str, timeout: int = REQUEST_TIMEOUT) -> CachedPage:
+        """
+        Fetch a page with a conditional request when a cached copy exists.
+
+        Args:
+            url: Page URL
+            timeout: Request timeout in seconds
+
+        Returns:
+            CachedPage with the (possibly cached) body
+        """
+        entry = self._load(url) or {}
+        headers = {}
+        if entry.get('has_body'):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = get_session().get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry.get('has_body'):
+            _, body_path = self._paths(url)
+            text = body_path.read_text(encoding='utf-8')
+            entry['content_hash'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            entry['checked_at'] = datetime.now().isoformat()
+            self._save(url, entry)
+            logger.info(f"{url}: 304 Not Modified, using cached copy")
+            return self._result(url, text, entry, not_modified=True)
+
+        response.raise_for_status()
+        text = _decode(response)
+        size = _count_transfer(response)
+
+        entry.update({
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'checked_at': datetime.now().isoformat(),
+        })
+        self._save(url, entry, text)
+        logger.info(f"Fetched {url} over HTTP ({size} bytes)")
+        return self._result(url, text, entry, not_modified=False)
+
+    def check(self, url: str, text: str) -> CachedPage:
+        """
+        Compare content obtained elsewhere (e.g. a rendered page) with the cache.
+
+        Only the hash is stored, not the body.
+
+        Args:
+            url: Page URL (cache key)
+            text: Page or container HTML
+
+        Returns:
+            CachedPage wrapping text
+        """
+        entry = self._load(url) or {}
+        entry.update({
+            'url': url,
+            'content_hash': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'checked_at': datetime.now().isoformat(),
+        })
+        self._save(url, entry)
+        return self._result(url, text, entry, not_modified=False)
+
+    def _result(self, url: str, text: str, entry: Dict, not_modified: bool) -> CachedPage:
+        content_hash = entry.get('content_hash') or hashlib.sha256(text.encode('utf-8')).hexdigest()
+        changed = self.refresh or entry.get('processed_hash') != content_hash
+        with self._lock:
+            self.stats['misses' if changed else 'hits'] += 1
+            if not_modified:
+                self.stats['not_modified'] += 1
+        if not changed:
+            _unchanged.pages = unchanged_pages() + 1
+        return CachedPage(url, text, content_hash, changed, not_modified)
+
+    def mark_processed(self, page: CachedPage):
+        """Record that a scraper finished processing this content successfully."""
+        entry = self._load(page.url) or {'url': page.url}
+        entry['processed_hash'] = page.content_hash
+        self._save(page.url, entry)
+
+
+PAGE_CACHE = PageCache()
+
+
+def fetch_page(url: str, timeout: int = REQUEST_TIMEOUT) -> CachedPage:
+    """Fetch a page through the shared PageCache (see PageCache.fetch)."""
+    with timed('fetch'):
+        return PAGE_CACHE.fetch(url, timeout)
+
+
+def check_page(url: str, text: str) -> CachedPage:
+    """Compare rendered content with the shared PageCache (see PageCache.check)."""
+    return PAGE_CACHE.check(url, text)
+
+
+def mark_page_processed(page: CachedPage):
+    """Mark a page as successfully scraped in the shared PageCache."""
+    PAGE_CACHE.mark_processed(page)
+
+
+def close_session():
+    """Close the shared HTTP session, if it was created."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            logger.info("HTTP session closed")
@@ -0,0 +1,233 @@
+"""
+Run history module.
+Stores every run of main.py (and each scraper's items, counts, bytes,
+duration and phase timings) in data/runs.db, apart from the git-tracked
+events.db so the daily commit only changes when events do, and summarizes
+duration trends per scraper.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Not tracked by git: the workflow keeps it in the Actions cache
+RUNS_DB_PATH = Path(__file__).parent.parent / "data" / "runs.db"
+
+
+class RunHistory:
+    """SQLite store of past runs and their per-scraper results."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Open (creating if needed) the run history database.
+
+        Args:
+            db_path: Optional custom database path
+        """
+        self.db_path = db_path or RUNS_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.cursor = self.conn.cursor()
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the runs / scraper_runs tables if they don't exist."""
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                elapsed REAL,
+                exit_code INTEGER,
+                workers INTEGER,
+                events INTEGER,
+                export_seconds REAL,
+                events_changed INTEGER
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scraper_runs (
+                run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+                scraper TEXT NOT NULL,
+                mode TEXT,
+                items INTEGER,
+                inserted INTEGER,
+                updated INTEGER,
+                unchanged INTEGER,
+                bytes INTEGER,
+                elapsed REAL,
+                phases TEXT,
+                error TEXT,
+                PRIMARY KEY (run_id, scraper)
+            )
+        """)
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_scraper_runs_scraper
+            ON scraper_runs (scraper, run_id)
+        """)
+        self.conn.commit()
+
+    def record_run(self, report: Dict) -> int:
+        """
+        Store a run and its per-scraper results in the run history.
+
+        Args:
+            report: Run report built by main.py (started_at, finished_at,
+                elapsed, exit_code, workers, export_seconds, events_changed
+                and a 'scrapers' list with scraper, mode, events, bytes,
+                elapsed, error, pipeline and breakdown per scraper)
+
+        Returns:
+            Id of the new run
+        """
+        scrapers = report.get('scrapers', [])
+        with self._lock, self.conn:
+            self.cursor.execute("""
+                INSERT INTO runs (
+                    started_at, finished_at, elapsed, exit_code, workers,
+                    events, export_seconds, events_changed
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                report['started_at'], report.get('finished_at'), report.get('elapsed'),
+                report.get('exit_code'), report.get('workers'),
+                sum(s.get('events') or 0 for s in scrapers), report.get('export_seconds'),
+                report.get('events_changed')
+            ))
+            run_id = self.cursor.lastrowid
+
+            rows = []
+            for s in scrapers:
+                written = (s.get('pipeline') or {}).get('written') or {}
+                rows.append((
+                    run_id, s['scraper'], s.get('mode'), s.get('events'),
+                    written.get('inserted'), written.get('updated'), written.get('unchanged'),
+                    s.get('bytes'), s.get('elapsed'), json.dumps(s.get('breakdown') or {}), s.get('error')
+                ))
+            self.cursor.executemany("""
+                INSERT INTO scraper_runs (
+                    run_id, scraper, mode, items, inserted, updated, unchanged,
+                    bytes, elapsed, phases, error
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        return run_id
+
+    def get_run_history(self, last: int = 20) -> List[Dict]:
+        """
+        Get the most recent runs, oldest first, each with its scraper results.
+
+        Args:
+            last: Number of runs
+
+        Returns:
+            List of run dictionaries with a 'scrapers' list
+        """
+        with self._lock:
+            self.cursor.execute("""
+                SELECT * FROM (SELECT * FROM runs ORDER BY id DESC LIMIT ?) ORDER BY id
+            """, (last,))
+            runs = [dict(row) for row in self.cursor.fetchall()]
+            if not runs:
+                return []
+
+            by_id = {run['id']: run for run in runs}
+            for run in runs:
+                run['scrapers'] = []
+            self.cursor.execute("""
+                SELECT * FROM scraper_runs WHERE run_id >= ? ORDER BY run_id, scraper
+            """, (runs[0]['id'],))
+            for row in self.cursor.fetchall():
+                result = dict(row)
+                result['phases'] = json.loads(result['phases']) if result['phases'] else {}
+                by_id[result['run_id']]['scrapers'].append(result)
+        return runs
+
+    def get_run_trends(self, last: int = 20, recent: int = 3, threshold: float = 1.25) -> Dict:
+        """
+        Summarize run durations and spot scrapers that got slower.
+
+        A scraper is flagged when the median duration of its last `recent`
+        runs exceeds the median of the earlier runs in the window by more
+        than `threshold` times.
+
+        Args:
+            last: Number of runs in the window
+            recent: Newest runs compared against the rest
+            threshold: Slowdown ratio that counts as a regression
+
+        Returns:
+            Dictionary with the run count, overall run durations and a
+            per-scraper summary (p50/p95 seconds, latest, items, bytes,
+            failures, per-phase p50 and regression ratio/flag)
+        """
+        runs = self.get_run_history(last)
+        per_scraper = {}
+        for run in runs:
+            for result in run['scrapers']:
+                per_scraper.setdefault(result['scraper'], []).append(result)
+
+        scrapers = {}
+        for name, results in per_scraper.items():
+            durations = [r['elapsed'] for r in results if r['elapsed'] is not None]
+            phase_names = dict.fromkeys(p for r in results for p in r['phases'])
+            summary = {
+                'runs': len(results),
+                'p50': _percentile(durations, 50),
+                'p95': _percentile(durations, 95),
+                'latest': durations[-1] if durations else None,
+                'items_p50': _percentile([r['items'] for r in results if r['items'] is not None], 50),
+                'bytes_p50': _percentile([r['bytes'] for r in results if r['bytes'] is not None], 50),
+                'failures': sum(1 for r in results if r['error']),
+                'phases_p50': {
+                    phase: _percentile([r['phases'][phase] for r in results if phase in r['phases']], 50)
+                    for phase in phase_names
+                },
+                'ratio': None,
+                'regression': False,
+            }
+            if len(durations) > recent + 1:
+                baseline = _percentile(durations[:-recent], 50)
+                newest = _percentile(durations[-recent:], 50)
+                if baseline:
+                    summary['ratio'] = round(newest / baseline, 2)
+                    summary['regression'] = newest > baseline * threshold
+            scrapers[name] = summary
+
+        totals = [run['elapsed'] for run in runs if run['elapsed'] is not None]
+        return {
+            'runs': len(runs),
+            'first_run': runs[0]['started_at'] if runs else None,
+            'last_run': runs[-1]['started_at'] if runs else None,
+            'elapsed_p50': _percentile(totals, 50),
+            'elapsed_p95': _percentile(totals, 95),
+            'scrapers': scrapers,
+        }
+
+    def close(self):
+        """Close database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
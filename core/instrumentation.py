@@ -0,0 +1,161 @@
+"""
+Core instrumentation module.
+Phase timers for the scraping hot path (navigation, waits, fetches, HTML
+parsing), an opt-in cProfile/tracemalloc profiler per scraper, and the
+JSON run report written next to scraper.log.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Written in the working directory, like scraper.log
+REPORT_PATH = Path("run_report.json")
+PROFILE_DIR = Path("profiles")
+
+# Allocation sites listed per scraper with --profile
+TOP_ALLOCATIONS = 10
+
+# Phase timer of the scraper running on the current thread
+_active = threading.local()
+
+
+class PhaseTimer:
+    """Count, total and slowest duration of each named phase of one scraper."""
+
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            stats = self.phases.setdefault(phase, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {
+            phase: {'count': s['count'], 'seconds': round(s['seconds'], 4), 'max': round(s['max'], 4)}
+            for phase, s in self.phases.items()
+        }
+
+
+def start_phases() -> PhaseTimer:
+    """Start collecting phase timings for the scraper on the current thread."""
+    _active.timer = PhaseTimer()
+    return _active.timer
+
+
+def stop_phases() -> Optional[PhaseTimer]:
+    """Stop collecting on the current thread and return what was collected."""
+    timer = getattr(_active, 'timer', None)
+    _active.timer = None
+    return timer
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Time a block as one occurrence of phase (no-op outside a scraper run).
+
+    Args:
+        phase: Phase name, e.g. 'navigate', 'wait', 'fetch', 'parse_html'
+    """
+    timer = getattr(_active, 'timer', None)
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - started)
+
+
+class ScraperProfiler:
+    """
+    cProfile + tracemalloc around one scraper (--profile).
+
+    Writes <name>.prof (load with pstats/snakeviz) and <name>.txt (top
+    functions by cumulative time and top allocation sites) to output_dir.
+    Both profilers are process-wide, so scrapers must run one at a time.
+    """
+
+    def __init__(self, name: str, output_dir: Path = PROFILE_DIR):
+        self.name = name
+        self.output_dir = output_dir
+        self.summary = None
+        self._profile = None
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prof_path = self.output_dir / f"{self.name}.prof"
+        text_path = self.output_dir / f"{self.name}.txt"
+        self._profile.dump_stats(str(prof_path))
+
+        allocations = [
+            {'where': str(stat.traceback[0]), 'kib': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+        ]
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats('cumulative').print_stats(30)
+        out.write(f"\nPeak traced memory: {peak / 1024:.1f} KiB\nTop allocations:\n")
+        for a in allocations:
+            out.write(f"  {a['kib']:>10.1f} KiB  {a['count']:>7} blocks  {a['where']}\n")
+        text_path.write_text(out.getvalue(), encoding='utf-8')
+
+        self.summary = {
+            'peak_kib': round(peak / 1024, 1),
+            'top_allocations': allocations,
+            'prof': str(prof_path),
+            'text': str(text_path),
+        }
+        logger.info(f"Profile of {self.name} written to {text_path}")
+        return False
+
+
+def write_run_report(report: Dict, path: Path = REPORT_PATH) -> Path:
+    """
+    Atomically write the JSON run report.
+
+    Args:
+        report: Report dictionary
+        path: Output file
+
+    Returns:
+        Path of the written report
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return path
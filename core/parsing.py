@@ -0,0 +1,56 @@
+"""
+Core HTML parsing module.
+Builds BeautifulSoup trees with the lxml backend, restricted (SoupStrainer)
+to the container each scraper actually reads instead of the whole document.
+"""
+
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from core.instrumentation import timed
+
+# Backend used by all scrapers (lxml is in requirements.txt)
+PARSER = "lxml"
+
+
+def parse_html(html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Parse a page, keeping only the elements matched by parse_only.
+
+    Elements matched by the strainer are kept with their whole subtree;
+    everything else (head, scripts, menus, footer) is discarded while
+    parsing, so it never becomes Tag objects.
+
+    Args:
+        html: Page (or fragment) HTML
+        parse_only: Scraper's container strainer; None parses everything
+
+    Returns:
+        BeautifulSoup tree whose top-level children are the matched containers
+    """
+    with timed('parse_html'):
+        return BeautifulSoup(html, PARSER, parse_only=parse_only)
+
+
+def container_strainer(name: Optional[str] = None, css_class: Optional[str] = None,
+                       element_id: Optional[str] = None) -> SoupStrainer:
+    """
+    Build a strainer matching a scraper's container element.
+
+    Args:
+        name: Tag name (e.g. 'div'); None matches any tag
+        css_class: One class the element must have
+        element_id: Element id
+
+    Returns:
+        SoupStrainer for parse_html()
+    """
+    attrs = {}
+    if css_class:
+        # A plain string only matches elements whose class attribute has no
+        # other class in bs4 4.12 ("programa_item col-md-4" would be dropped)
+        attrs['class'] = lambda value: value is not None and css_class in value.split()
+    if element_id:
+        attrs['id'] = element_id
+    return SoupStrainer(name, attrs=attrs)
@@ -0,0 +1,351 @@
+"""
+Core pipeline module.
+Runs a scraper as streaming stages - source -> parse -> normalize -> store -
+so parsing overlaps with SQLite writes. Items from the scraper's generator
+go through parse/normalize (optionally in a worker pool) and a bounded
+queue into a single writer thread that stores them in batches with
+EventDatabase.upsert_events(). Each stage records throughput, and the
+queue records its depth.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Events per upsert_events() call
+BATCH_SIZE = 200
+
+# Events waiting for the writer before producers block
+QUEUE_SIZE = 1000
+
+# Seconds a partial batch waits for more events before it is written
+FLUSH_INTERVAL = 0.5
+
+_DONE = object()
+
+# Metrics of the last pipeline run on the current thread (one scraper per thread)
+_last = threading.local()
+
+
+class StageMetrics:
+    """Item count, errors and busy time of one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, items: int = 1, errors: int = 0):
+        with self._lock:
+            self.seconds += seconds
+            self.items += items
+            self.errors += errors
+
+    def as_dict(self) -> Dict:
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 4),
+            'per_second': round(self.items / self.seconds, 1) if self.seconds else None,
+        }
+
+
+class BatchWriter:
+    """
+    Single writer thread draining a bounded queue into the database in batches.
+
+    It also offers the write API scrapers use on EventDatabase (upsert_event()
+    and batch()), so an unconverted scrape(driver, db) can be handed a
+    BatchWriter instead of the database (see run_legacy_scraper()).
+    """
+
+    def __init__(self, db, batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.metrics = StageMetrics('store')
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.error = None
+        self.max_depth = 0
+        self._depth_total = 0
+        self._puts = 0
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, event: Dict):
+        """Queue an event for writing (blocks while the queue is full)."""
+        if self.error:
+            raise self.error
+        self.queue.put(event)
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._puts += 1
+
+    def upsert_event(self, event: Dict):
+        """EventDatabase-compatible alias of put()."""
+        self.put(event)
+
+    @contextmanager
+    def batch(self):
+        """EventDatabase-compatible no-op: the writer already batches."""
+        yield self
+
+    def _run(self):
+        pending = []
+        done = False
+        while not done:
+            try:
+                item = self.queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                pending.append(item)
+            if pending and (done or item is None or len(pending) >= self.batch_size):
+                self._flush(pending)
+                pending = []
+
+    def _flush(self, events):
+        # After a failed write keep draining the queue so producers don't block
+        if self.error:
+            return
+        started = time.perf_counter()
+        try:
+            counts = self.db.upsert_events(events)
+        except Exception as e:
+            self.error = e
+            self.metrics.add(time.perf_counter() - started, items=0, errors=len(events))
+            logger.error(f"Writer failed storing {len(events)} events: {e}", exc_info=True)
+            return
+        for key in self.counts:
+            self.counts[key] += counts.get(key, 0)
+        self.metrics.add(time.perf_counter() - started, items=len(events))
+
+    def queue_metrics(self) -> Dict:
+        return {
+            'capacity': self.queue.maxsize,
+            'max_depth': self.max_depth,
+            'avg_depth': round(self._depth_total / self._puts, 1) if self._puts else 0,
+        }
+
+    def close(self) -> Dict[str, int]:
+        """
+        Write what is left and stop the writer thread.
+
+        Returns:
+            Accumulated inserted/updated/unchanged counts
+
+        Raises:
+            Exception: The error that stopped the writer, if any
+        """
+        self.queue.put(_DONE)
+        self._thread.join()
+        if self.error:
+            raise self.error
+        return self.counts
+
+
+def normalize_event(event: Dict) -> Dict:
+    """Default normalize stage: trim the title and drop empty/duplicate tags."""
+    event['title'] = ' '.join(event['title'].split())
+    event['tags'] = list(dict.fromkeys(tag.strip() for tag in event.get('tags') or [] if tag and tag.strip()))
+    return event
+
+
+class Pipeline:
+    """
+    Streaming scrape -> parse -> normalize -> store pipeline.
+
+    Args:
+        db: EventDatabase (or anything with upsert_events())
+        parse: Raw item -> event dict, or None to drop it (default: items already are events)
+        normalize: Event -> event, applied after parse
+        workers: Parse/normalize threads; 1 parses on the calling thread
+        batch_size: Events per database write
+        queue_size: Bound of the writer queue
+        name: Label used in logs (e.g. the scraper's SOURCE_NAME)
+    """
+
+    def __init__(self, db, parse: Optional[Callable] = None, normalize: Optional[Callable] = normalize_event,
+                 workers: int = 1, batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE,
+                 name: str = 'pipeline'):
+        self.db = db
+        self.parse = parse
+        self.normalize = normalize
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.name = name
+        self.stages = {}
+
+    def run(self, items: Iterable) -> Dict:
+        """
+        Push every item through the stages and wait for the writer to finish.
+
+        Args:
+            items: Raw items (or event dicts), typically a scraper generator
+
+        Returns:
+            Metrics dictionary: 'events' stored, 'dropped', 'elapsed',
+            per-stage 'stages', writer 'queue' depth and 'written' counts
+        """
+        started = time.perf_counter()
+        self.stages = {name: StageMetrics(name) for name in ('source', 'parse', 'normalize')}
+        writer = BatchWriter(self.db, self.batch_size, self.queue_size)
+        dropped = 0
+
+        try:
+            if self.workers > 1:
+                with ThreadPoolExecutor(self.workers, thread_name_prefix='parse') as executor:
+                    # Bounded look-ahead keeps memory flat and preserves item order
+                    in_flight = deque()
+                    for item in self._source(items):
+                        in_flight.append(executor.submit(self._process, item))
+                        if len(in_flight) >= self.workers * 2:
+                            dropped += self._emit(in_flight.popleft().result(), writer)
+                    while in_flight:
+                        dropped += self._emit(in_flight.popleft().result(), writer)
+            else:
+                for item in self._source(items):
+                    dropped += self._emit(self._process(item), writer)
+        finally:
+            counts = writer.close()
+
+        stages = {name: stage.as_dict() for name, stage in self.stages.items()}
+        stages['store'] = writer.metrics.as_dict()
+        metrics = {
+            'name': self.name,
+            'events': writer.metrics.items,
+            'dropped': dropped,
+            'elapsed': round(time.perf_counter() - started, 4),
+            'stages': stages,
+            'queue': writer.queue_metrics(),
+            'written': counts,
+        }
+        _last.metrics = metrics
+
+        rates = ', '.join(f"{name} {s['per_second'] or '-'}/s" for name, s in stages.items())
+        logger.info(
+            f"{self.name}: pipeline stored {metrics['events']} events ({dropped} dropped) | {rates} | "
+            f"queue max {metrics['queue']['max_depth']}/{metrics['queue']['capacity']}"
+        )
+        return metrics
+
+    def _source(self, items: Iterable):
+        """Iterate the scraper's items, timing how long each one takes to produce."""
+        stage = self.stages['source']
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage.add(time.perf_counter() - started, items=0)
+                return
+            stage.add(time.perf_counter() - started)
+            yield item
+
+    def _process(self, item) -> Optional[Dict]:
+        """Parse and normalize one item (runs on a worker when workers > 1)."""
+        event = item
+        if self.parse:
+            started = time.perf_counter()
+            try:
+                event = self.parse(item)
+            except Exception as e:
+                self.stages['parse'].add(time.perf_counter() - started, items=0, errors=1)
+                logger.error(f"Error parsing item: {e}")
+                return None
+            self.stages['parse'].add(time.perf_counter() - started)
+
+        if event is not None and self.normalize:
+            started = time.perf_counter()
+            try:
+                event = self.normalize(event)
+            except Exception as e:
+                self.stages['normalize'].add(time.perf_counter() - started, items=0, errors=1)
+                logger.error(f"Error normalizing event: {e}")
+                return None
+            self.stages['normalize'].add(time.perf_counter() - started)
+        return event
+
+    @staticmethod
+    def _emit(event: Optional[Dict], writer: BatchWriter) -> int:
+        """Hand an event to the writer; returns 1 when it was dropped."""
+        if event is None:
+            return 1
+        writer.put(event)
+        return 0
+
+
+def run_pipeline(items: Iterable, db, parse: Optional[Callable] = None, **kwargs) -> Dict:
+    """Build a Pipeline and run it over items (see Pipeline for the arguments)."""
+    return Pipeline(db, parse=parse, **kwargs).run(items)
+
+
+def is_complete(metrics: Dict) -> bool:
+    """
+    Whether a pipeline run stored events and parsed every item cleanly.
+
+    Scrapers only mark their page processed when this holds, so a broken or
+    blocked page (0 events, parse errors) is parsed again on the next run.
+    """
+    stages = metrics['stages']
+    errors = sum(stages[name]['errors'] for name in ('parse', 'normalize') if name in stages)
+    return metrics['events'] > 0 and errors == 0
+
+
+def run_legacy_scraper(scrape: Callable, driver, db, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Shim for scrapers still written as one scrape(driver, db) loop.
+
+    The scraper gets a BatchWriter in place of the database, so its
+    upsert_event() calls are queued and written by the writer thread
+    while it keeps parsing.
+
+    Args:
+        scrape: The scraper's scrape function
+        driver: WebDriver instance, or None for HTTP scrapers
+        db: EventDatabase
+        batch_size: Events per database write
+
+    Returns:
+        Whatever scrape() returned (its events count)
+    """
+    started = time.perf_counter()
+    writer = BatchWriter(db, batch_size)
+    try:
+        count = scrape(driver, writer)
+    finally:
+        counts = writer.close()
+    _last.metrics = {
+        'name': getattr(scrape, '__module__', 'legacy'),
+        'events': writer.metrics.items,
+        'dropped': 0,
+        'elapsed': round(time.perf_counter() - started, 4),
+        'stages': {'store': writer.metrics.as_dict()},
+        'queue': writer.queue_metrics(),
+        'written': counts,
+    }
+    return count
+
+
+def reset_pipeline_metrics():
+    """Forget the metrics of the current thread's last pipeline run."""
+    _last.metrics = None
+
+
+def pipeline_metrics() -> Optional[Dict]:
+    """Metrics of the last pipeline run on the current thread, if any."""
+    return getattr(_last, 'metrics', None)
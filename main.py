@@ -3,17 +3,33 @@ Aveiro Cultural Events Aggregator - Main Orchestrator
 Runs web scrapers, stores events in SQLite, and exports JSON for frontend.
 """
 
+import os
 import sys
+import time
+import itertools
 import logging
+import argparse
+import sqlite3
 import importlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from core.driver import initialize_driver, close_driver
+from core.dates import set_reference_date
+from core.driver import DriverPool, initialize_driver, block_resources, page_transfer_bytes
+from core.fetcher import (
+    FETCH_BROWSER, PAGE_CACHE, close_session, reset_transfer_count, reset_unchanged_pages,
+    transfer_count, unchanged_pages
+)
 from core.database import EventDatabase
+from core.history import RunHistory
+from core.instrumentation import ScraperProfiler, start_phases, stop_phases, write_run_report
+from core.pipeline import pipeline_metrics, reset_pipeline_metrics
 
 
 # Configure logging
@@ -37,18 +53,299 @@ SCRAPERS = [
 ]
 
 
-def main():
+# Phases of a scraper run, in the order they happen
+HOT_PATH = ('navigate', 'wait', 'fetch', 'parse_html', 'parse_item', 'normalize', 'upsert')
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Aveiro Cultural Events Aggregator")
+    parser.add_argument(
+        '--workers', type=int, default=1, metavar='N',
+        help="Number of scrapers to run concurrently, each with its own Chrome (default: 1)"
+    )
+    parser.add_argument(
+        '--browser', action='store_true',
+        help="Force every scraper to use Chrome, ignoring their FETCH_MODE"
+    )
+    parser.add_argument(
+        '--compact-json', action='store_true',
+        help="Export events.json without indentation"
+    )
+    parser.add_argument(
+        '--force-export', action='store_true',
+        help="Rewrite events.json even if no event changed"
+    )
+    parser.add_argument(
+        '--refresh', action='store_true',
+        help="Parse every agenda even if it didn't change since the last run"
+    )
+    parser.add_argument(
+        '--no-block', action='store_true',
+        help="Let Chrome load images, fonts, media and trackers"
+    )
+    parser.add_argument(
+        '--chrome-profile', metavar='DIR', default=os.environ.get('CHROME_PROFILE_DIR'),
+        help="Persistent Chrome profile directory (keeps the disk cache between runs); "
+             "one subdirectory per worker. Env: CHROME_PROFILE_DIR"
+    )
+    parser.add_argument(
+        '--chrome-debugger', metavar='HOST:PORT', default=os.environ.get('CHROME_DEBUGGER_ADDRESS'),
+        help="Attach to a running Chrome (--remote-debugging-port) instead of launching one; "
+             "uses a single browser worker. Env: CHROME_DEBUGGER_ADDRESS"
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="Capture cProfile and tracemalloc output per scraper in profiles/ (runs scrapers one at a time)"
+    )
+
+    subcommands = parser.add_subparsers(dest='command')
+    history = subcommands.add_parser(
+        'history', help="Show run duration trends (p50/p95) and scrapers that got slower"
+    )
+    history.add_argument(
+        '--last', type=int, default=20, metavar='N',
+        help="Number of recent runs to analyse (default: 20)"
+    )
+    history.add_argument(
+        '--threshold', type=float, default=1.25,
+        help="Slowdown ratio of the last 3 runs vs the earlier ones flagged as a regression (default: 1.25)"
+    )
+    subcommands.add_parser(
+        'checkpoint', help="Fold the WAL into data/events.db (a scrape run already does this on exit)"
+    )
+    subcommands.add_parser(
+        'dedup', help="Re-link cross-source duplicates over the whole history (runs only cover upcoming events)"
+    )
+    return parser.parse_args(argv)
+
+
+def get_fetch_mode(scraper_module, force_browser=False):
+    """
+    Return how a scraper fetches its pages ('http' or 'browser').
+
+    Scrapers declare FETCH_MODE at module level; modules without it use the browser.
+    """
+    if force_browser:
+        return FETCH_BROWSER
+    return getattr(scraper_module, 'FETCH_MODE', FETCH_BROWSER)
+
+
+def make_driver_factory(args):
+    """
+    Build the DriverPool factory for the browser options on the command line.
+
+    Each driver created with --chrome-profile gets its own profile
+    subdirectory, since Chrome can't share one between running instances.
+    """
+    if args.chrome_debugger:
+        return partial(initialize_driver, lean=not args.no_block, debugger_address=args.chrome_debugger)
+    if not args.chrome_profile:
+        return partial(initialize_driver, lean=not args.no_block)
+
+    worker_ids = itertools.count()
+
+    def factory():
+        profile_dir = Path(args.chrome_profile) / f"worker-{next(worker_ids)}"
+        return initialize_driver(lean=not args.no_block, user_data_dir=str(profile_dir))
+
+    return factory
+
+
+def run_scraper(scraper_module_name, pool, db, force_browser=False, block=True, profile=False):
+    """
+    Run a single scraper module, with a driver borrowed from the pool if it needs one.
+
+    Args:
+        scraper_module_name: Dotted module path of the scraper
+        pool: DriverPool providing WebDriver instances
+        db: EventDatabase shared by all scrapers
+        force_browser: Use Chrome even for scrapers declared as 'http'
+        block: Apply the resource block list, minus the scraper's ALLOWED_RESOURCES
+        profile: Run the scraper under cProfile and tracemalloc
+
+    Returns:
+        Dictionary with the scraper name, its SOURCE_NAME, events count,
+        whether it was skipped (page unchanged), bytes transferred, elapsed
+        seconds, phase timings, pipeline stage metrics, profile summary
+        (with profile) and error (if any)
+    """
+    result = {
+        'scraper': scraper_module_name, 'source': None, 'skipped': False, 'mode': None, 'events': 0,
+        'bytes': 0, 'elapsed': 0.0, 'error': None, 'phases': {}, 'pipeline': None, 'profile': None
+    }
+    started = time.perf_counter()
+    reset_transfer_count()
+    reset_unchanged_pages()
+    reset_pipeline_metrics()
+    start_phases()
+    profiler = ScraperProfiler(scraper_module_name.rsplit('.', 1)[-1]) if profile else None
+
+    try:
+        logger.info(f"Running scraper: {scraper_module_name}")
+
+        # Dynamically import the scraper module
+        scraper_module = importlib.import_module(scraper_module_name)
+        result['source'] = getattr(scraper_module, 'SOURCE_NAME', None)
+
+        # Execute the scraper's scrape() function (driver is None for plain HTTP)
+        result['mode'] = get_fetch_mode(scraper_module, force_browser)
+        with profiler or nullcontext():
+            if result['mode'] == FETCH_BROWSER:
+                with pool.driver() as driver:
+                    if block:
+                        block_resources(driver, getattr(scraper_module, 'ALLOWED_RESOURCES', ()))
+                    result['events'] = scraper_module.scrape(driver, db)
+                    result['bytes'] = page_transfer_bytes(driver)
+            else:
+                result['events'] = scraper_module.scrape(None, db)
+                result['bytes'] = transfer_count()
+        result['pipeline'] = pipeline_metrics()
+        result['skipped'] = result['pipeline'] is None and unchanged_pages() > 0
+
+        logger.info(f"✓ {scraper_module_name}: {result['events']} events scraped")
+
+    except Exception as e:
+        result['error'] = str(e)
+        logger.error(f"✗ Error in scraper {scraper_module_name}: {e}", exc_info=True)
+
+    result['elapsed'] = time.perf_counter() - started
+    result['phases'] = stop_phases().as_dict()
+    if profiler:
+        result['profile'] = profiler.summary
+    return result
+
+
+def phase_breakdown(result):
+    """
+    Seconds spent per phase of one scraper run, in hot-path order.
+
+    Combines the phase timers (navigation, waits, fetch, HTML parse) with
+    the pipeline stages (per-item parsing, normalization, database writes).
+    """
+    phases = {name: stats['seconds'] for name, stats in result['phases'].items()}
+    stages = (result['pipeline'] or {}).get('stages', {})
+    for phase, stage in (('parse_item', 'parse'), ('normalize', 'normalize'), ('upsert', 'store')):
+        if stage in stages:
+            phases[phase] = stages[stage]['seconds']
+    ordered = {name: phases.pop(name) for name in HOT_PATH if name in phases}
+    ordered.update(phases)
+    return ordered
+
+
+def write_report(results, started_at, run_started, workers, export_seconds, db, exit_code, diff=None):
+    """
+    Write the JSON run report (per-scraper phases, pipeline metrics, profiles,
+    per-source event diff) next to scraper.log and record the run in
+    data/runs.db.
+    """
+    report = {
+        'started_at': started_at,
+        'finished_at': datetime.now().isoformat(),
+        'elapsed': round(time.perf_counter() - run_started, 3),
+        'exit_code': exit_code,
+        'workers': workers,
+        'export_seconds': round(export_seconds, 3) if export_seconds is not None else None,
+        'events_changed': db.last_export_changed if db else None,
+        'page_cache': dict(PAGE_CACHE.stats),
+        'scrapers': [
+            {**r, 'elapsed': round(r['elapsed'], 3), 'breakdown': phase_breakdown(r)} for r in results
+        ],
+        'diff': diff,
+    }
+    try:
+        path = write_run_report(report)
+        logger.info(f"Run report written to {path}")
+    except OSError as e:
+        logger.warning(f"Could not write run report: {e}")
+
+    try:
+        with RunHistory() as history:
+            run_id = history.record_run(report)
+        logger.info(f"Run #{run_id} recorded in run history")
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record run history: {e}")
+
+
+def show_history(args):
+    """Print p50/p95 durations per scraper over the last runs and flag regressions."""
+    with RunHistory() as history:
+        trends = history.get_run_trends(last=args.last, threshold=args.threshold)
+
+    if not trends['runs']:
+        print("No runs recorded yet.")
+        return 0
+
+    def secs(value):
+        return f"{value:7.2f}s" if value is not None else "      -"
+
+    print(f"Last {trends['runs']} runs ({trends['first_run']} → {trends['last_run']}): "
+          f"p50 {secs(trends['elapsed_p50']).strip()}, p95 {secs(trends['elapsed_p95']).strip()}")
+    print(f"{'scraper':<32} {'runs':>4} {'p50':>8} {'p95':>8} {'latest':>8} {'items':>6} {'KiB':>8} {'fails':>5}  trend")
+    regressions = 0
+    for name, t in sorted(trends['scrapers'].items()):
+        trend = f"{t['ratio']:.2f}x" if t['ratio'] is not None else "-"
+        if t['regression']:
+            regressions += 1
+            slowest = max(t['phases_p50'].items(), key=lambda item: item[1] or 0, default=(None, None))[0]
+            trend += f"  ⚠ slower (biggest phase: {slowest or '-'})"
+        print(f"{name:<32} {t['runs']:>4} {secs(t['p50'])} {secs(t['p95'])} {secs(t['latest'])} "
+              f"{t['items_p50'] if t['items_p50'] is not None else '-':>6} "
+              f"{(t['bytes_p50'] or 0) / 1024:>8.1f} {t['failures']:>5}  {trend}")
+
+    if regressions:
+        print(f"\n{regressions} scraper(s) slower than {args.threshold}x their earlier median")
+    return 0
+
+
+def checkpoint_database():
+    """Checkpoint events.db so the file on disk holds every committed change."""
+    with EventDatabase() as db:
+        result = db.checkpoint()
+    logger.info(f"WAL checkpoint: {result['checkpointed']}/{result['log_frames']} frames")
+    return 1 if result['busy'] else 0
+
+
+def relink_duplicates():
+    """Re-run duplicate linking over every dated event, past ones included."""
+    with EventDatabase() as db:
+        db.link_duplicates()
+    return 0
+
+
+def main(argv=None):
     """Main orchestrator function."""
+    args = parse_args(argv)
+    if args.command == 'history':
+        return show_history(args)
+    if args.command == 'checkpoint':
+        return checkpoint_database()
+    if args.command == 'dedup':
+        return relink_duplicates()
+
+    workers = max(1, min(args.workers, len(SCRAPERS)))
+    if args.profile and workers > 1:
+        # cProfile and tracemalloc are process-wide: profile one scraper at a time
+        logger.info("--profile runs scrapers sequentially")
+        workers = 1
+
     logger.info("=" * 80)
     logger.info("Starting Aveiro Cultural Events Aggregator")
     logger.info(f"Execution time: {datetime.now().isoformat()}")
+    logger.info(f"Workers: {workers}")
     logger.info("=" * 80)
 
-    driver = None
+    pool = None
     db = None
-    total_events = 0
-    scrapers_success = 0
-    scrapers_failed = 0
+    results = []
+    run_started = time.perf_counter()
+    started_at = datetime.now().isoformat()
+    export_seconds = None
+    diff = None
+    exit_code = 1
+    PAGE_CACHE.refresh = args.refresh
+    # Same "today" for every date parsed in this run
+    today = set_reference_date()
 
     try:
         # Initialize database
@@ -56,39 +353,47 @@ def main():
         db = EventDatabase()
 
         # Show initial stats
-        stats = db.get_stats()
+        with db.reader() as reader:
+            stats = reader.get_stats()
         logger.info(f"Database stats: {stats}")
 
-        # Initialize Selenium driver
-        driver = initialize_driver()
+        # Selenium drivers are created on demand, so Chrome only starts
+        # if some scraper actually needs a browser
+        # An attached browser is a single shared Chrome, so it gets one driver
+        pool_size = 1 if args.chrome_debugger else workers
+        pool = DriverPool(size=pool_size, factory=make_driver_factory(args))
 
-        # Run each scraper
-        for scraper_module_name in SCRAPERS:
-            try:
-                logger.info(f"\n{'=' * 60}")
-                logger.info(f"Running scraper: {scraper_module_name}")
-                logger.info('=' * 60)
+        # Run the scrapers (one after another when workers == 1)
+        logger.info(f"\n{'=' * 60}")
+        db.start_run_diff()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper') as executor:
+            results = list(executor.map(
+                lambda name: run_scraper(name, pool, db, args.browser, not args.no_block, args.profile), SCRAPERS
+            ))
 
-                # Dynamically import the scraper module
-                scraper_module = importlib.import_module(scraper_module_name)
+        total_events = sum(r['events'] for r in results)
+        scrapers_failed = sum(1 for r in results if r['error'])
+        scrapers_success = len(results) - scrapers_failed
+        # Every source that ran is in the diff, even with 0 events (all vanished);
+        # skipped ones (agenda unchanged) are not
+        diff = db.run_diff(sources=[r['source'] for r in results if r['source'] and not r['skipped']])
 
-                # Execute the scraper's scrape() function
-                events_count = scraper_module.scrape(driver, db)
-                total_events += events_count
-                scrapers_success += 1
-
-                logger.info(f"✓ {scraper_module_name}: {events_count} events scraped")
-
-            except Exception as e:
-                scrapers_failed += 1
-                logger.error(f"✗ Error in scraper {scraper_module_name}: {e}", exc_info=True)
-                continue
+        # Same show listed by several sources -> one canonical event in the export
+        # (only upcoming events are exported, so past ones keep their links)
+        db.link_duplicates(from_date=today.isoformat())
 
         # Export to JSON
         logger.info("\n" + "=" * 60)
         logger.info("Exporting data to JSON...")
-        json_path = db.export_to_json()
-        logger.info(f"✓ JSON exported to: {json_path}")
+        export_started = time.perf_counter()
+        json_path = db.export_to_json(compact=args.compact_json, force=args.force_export)
+        if db.last_export_changed:
+            logger.info(f"✓ JSON exported to: {json_path}")
+        else:
+            logger.info(f"✓ No event changes, kept: {json_path}")
+        manifest = db.export_shards(compact=args.compact_json)
+        logger.info(f"✓ Month shards exported: {len(manifest['months'])} months")
+        export_seconds = time.perf_counter() - export_started
 
         # Final statistics
         logger.info("\n" + "=" * 80)
@@ -98,24 +403,62 @@ def main():
         logger.info(f"Scrapers successful: {scrapers_success}")
         logger.info(f"Scrapers failed: {scrapers_failed}")
         logger.info(f"Total events scraped: {total_events}")
+        logger.info(f"Events changed: {'yes' if db.last_export_changed else 'no'}")
+        cache_stats = PAGE_CACHE.stats
+        logger.info(
+            f"Page cache: {cache_stats['hits']} hits ({cache_stats['not_modified']} via 304), "
+            f"{cache_stats['misses']} misses"
+        )
+
+        logger.info("Scraper timings:")
+        for r in sorted(results, key=lambda r: r['elapsed'], reverse=True):
+            status = "✗" if r['error'] else "✓"
+            logger.info(
+                f"  {status} {r['scraper']:<32} {r['mode'] or '-':<8} "
+                f"{r['elapsed']:7.2f}s  {r['events']:4d} events  {r['bytes'] / 1024:8.1f} KiB"
+            )
+            breakdown = phase_breakdown(r)
+            if breakdown:
+                logger.info("      " + "  ".join(f"{name} {seconds:.2f}s" for name, seconds in breakdown.items()))
+        logger.info(f"Total runtime: {time.perf_counter() - run_started:.2f}s")
+
+        logger.info("Event changes (+added ~changed -vanished):")
+        for source, d in sorted(diff.items()):
+            logger.info(
+                f"  {source:<32} +{len(d['added'])} ~{len(d['changed'])} -{len(d['vanished'])}"
+                f"  ({d['unchanged']} unchanged)"
+            )
+            for event in d['vanished']:
+                logger.info(f"      - {event['start_date'] or '?'} {event['title']}")
 
         final_stats = db.get_stats()
         logger.info(f"Total events in database: {final_stats['total_events']}")
         logger.info(f"Future events: {final_stats['future_events']}")
+        logger.info(f"Cross-source duplicates linked: {final_stats['duplicates']}")
         logger.info(f"Events by source: {final_stats['by_source']}")
+        logger.info(f"Future events by source: {final_stats['future_by_source']}")
+        logger.info(f"Date range: {final_stats['first_date']} → {final_stats['last_date']}")
         logger.info("=" * 80)
 
-        return 0
+        exit_code = 0
+        return exit_code
 
     except Exception as e:
         logger.error(f"Critical error in main execution: {e}", exc_info=True)
-        return 1
+        return exit_code
 
     finally:
+        write_report(results, started_at, run_started, workers, export_seconds, db, exit_code, diff)
         # Cleanup
-        if driver:
-            close_driver(driver)
+        if pool:
+            pool.close()
+        close_session()
         if db:
+            # Leave events.db self-contained (no pending WAL frames) for the commit
+            try:
+                db.checkpoint()
+            except sqlite3.Error as e:
+                logger.warning(f"WAL checkpoint failed: {e}")
             db.close()
         logger.info("Execution completed\n")
 
@@ -3,14 +3,16 @@ AveiroOn scraper module.
 """
 
 import logging
-import re
-import time
-from datetime import datetime
 from typing import Dict, Optional
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from core.dates import parse_date
+from core.driver import wait_for_ready
+from core.instrumentation import timed
+from core.parsing import container_strainer, parse_html
+from core.pipeline import is_complete, run_pipeline
+from core.fetcher import FETCH_BROWSER, check_page, mark_page_processed
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +20,14 @@ SOURCE_NAME = "AveiroOn"
 AGENDA_URL = "https://aveiroon.cm-aveiro.pt/eventos/"
 BASE_URL = "https://aveiroon.cm-aveiro.pt"
 
-# Meses em Inglês e Português para garantir
-MONTHS = {
-    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
-    'fev': 2, 'abr': 4, 'mai': 5, 'ago': 8, 'set': 9, 'out': 10, 'dez': 12
-}
+# O carrossel é montado por JavaScript, precisa de Chrome
+FETCH_MODE = FETCH_BROWSER
+
+# Só os contentores .display-today-events são convertidos em árvore
+PARSE_ONLY = container_strainer(css_class='display-today-events')
+
+# Tempo máximo (s) à espera que o carrossel e as imagens lazy estabilizem
+READY_TIMEOUT = 6
 
 
 def scrape(driver, db):
@@ -32,18 +36,23 @@ def scrape(driver, db):
 
     try:
         logger.info(f"Navigating to: {AGENDA_URL}")
-        driver.get(AGENDA_URL)
+        with timed('navigate'):
+            driver.get(AGENDA_URL)
 
         # Esperar que o carrossel desktop carregue
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".display-today-events.intro"))
-            )
-            time.sleep(3)
-        except Exception:
-            logger.warning("Timeout waiting for desktop events container.")
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        with timed('wait'):
+            try:
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".display-today-events.intro"))
+                )
+                wait_for_ready(
+                    driver, '.display-today-events.intro div.today-event', timeout=READY_TIMEOUT,
+                    network_idle=True, lazy_image_attrs=('data-lazy-src', 'src')
+                )
+            except Exception:
+                logger.warning("Timeout waiting for desktop events container.")
+
+        soup = parse_html(driver.page_source, PARSE_ONLY)
 
         # ✅ Procura APENAS o contentor desktop (tem classe "intro")
         container = soup.select_one('.display-today-events.intro')
@@ -52,28 +61,25 @@ def scrape(driver, db):
             logger.error("Container desktop '.display-today-events.intro' não encontrado!")
             return 0
 
-        # Procuramos os eventos apenas DENTRO desse contentor desktop
-        event_items = container.find_all('div', class_='today-event')
-        logger.info(f"Found {len(event_items)} unique event items (desktop only)")
+        # O HTML renderizado muda sempre (scripts, nonces); comparamos só o contentor
+        page = check_page(AGENDA_URL, str(container))
+        if not page.changed:
+            logger.info(f"{SOURCE_NAME}: events container unchanged since last run, skipping")
+            return 0
 
-        for item in event_items:
-            try:
-                event_data = _parse_event_item(item)
-
-                # Validação: Só guardamos se tiver título e data válida
-                if event_data and event_data['title'] and event_data['start_date']:
-                    logger.debug(f"Processando: {event_data['title']} -> {event_data['start_date']}")
-                    db.upsert_event(event_data)
-                    events_count += 1
-                else:
-                    if event_data:
-                        logger.debug(f"Ignorado (sem data válida): {event_data.get('title')}")
-
-            except Exception as e:
-                logger.error(f"Error parsing item: {e}")
-                continue
-
-        logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
+        # Itens -> parse -> escrita em lotes numa thread à parte
+        metrics = run_pipeline(iter_items(container), db, parse=parse_item, name=SOURCE_NAME)
+        events_count = metrics['events']
+
+        # Só marca a página como processada se não houve falhas (senão volta a ser lida)
+        if is_complete(metrics):
+            mark_page_processed(page)
+            logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
+        else:
+            logger.warning(
+                f"{SOURCE_NAME}: scraped {events_count} events with "
+                f"{metrics['stages']['parse']['errors']} parse errors; page will be parsed again next run"
+            )
         return events_count
 
     except Exception as e:
@@ -81,6 +87,27 @@ def scrape(driver, db):
         return events_count
 
 
+def iter_items(container):
+    """Yield the div.today-event items of the desktop container."""
+    # Procuramos os eventos apenas DENTRO desse contentor desktop
+    event_items = container.find_all('div', class_='today-event')
+    logger.info(f"Found {len(event_items)} unique event items (desktop only)")
+    yield from event_items
+
+
+def parse_item(item) -> Optional[Dict]:
+    """Parse an item, dropping it when it has no title or valid date."""
+    event_data = _parse_event_item(item)
+
+    # Validação: Só guardamos se tiver título e data válida
+    if event_data and event_data['title'] and event_data['start_date']:
+        logger.debug(f"Processando: {event_data['title']} -> {event_data['start_date']}")
+        return event_data
+    if event_data:
+        logger.debug(f"Ignorado (sem data válida): {event_data.get('title')}")
+    return None
+
+
 def _parse_event_item(item) -> Optional[Dict]:
     title_tag = item.find('p', class_='title-today-event')
     if not title_tag: return None
@@ -92,7 +119,11 @@ def _parse_event_item(item) -> Optional[Dict]:
     if date_div:
         date_p = date_div.find('p')
         if date_p:
-            start_date = _parse_aveiroon_date(date_p.get_text(strip=True))
+            date_text = date_p.get_text(strip=True)
+            start_date = parse_date(date_text)
+            if not start_date:
+                # Log para saberes se falhou
+                logger.warning(f"Falha ao ler data: '{date_text}'")
 
     # Link
     link_tag = item.find('a', class_='today-event-link', href=True)
@@ -130,32 +161,3 @@ def _parse_event_item(item) -> Optional[Dict]:
         'all_day': True
     }
 
-
-def _parse_aveiroon_date(date_text: str) -> Optional[str]:
-    """Parse date text ignoring fancy dashes."""
-    if not date_text: return None
-
-    clean_text = date_text.lower().strip()
-    current_year = datetime.now().year
-
-    # Regex: Digitos + Lixo (traços, espaços) + Letras
-    match = re.search(r'(\d+)\s*[^0-9a-z]+\s*([a-z]+)', clean_text)
-
-    if match:
-        day, month_str = match.groups()
-        month = MONTHS.get(month_str)
-
-        if month:
-            try:
-                dt = datetime(current_year, month, int(day))
-                # Ajuste de ano (ex: Evento em Jan, estamos em Dez)
-                if datetime.now().month == 12 and month < 3:
-                    dt = dt.replace(year=current_year + 1)
-
-                return dt.strftime('%Y-%m-%d')
-            except ValueError:
-                pass
-
-    # Log para saberes se falhou
-    logger.warning(f"Falha ao ler data: '{clean_text}'")
-    return None
\ No newline at end of file
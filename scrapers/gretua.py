@@ -5,13 +5,15 @@ Stops scraping when 'Past Events' section is reached.
 """
 
 import logging
-import time
-from datetime import datetime
 from typing import Dict, Optional
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from core.driver import wait_for_ready
+from core.instrumentation import timed
+from core.parsing import container_strainer, parse_html
+from core.pipeline import is_complete, run_pipeline
+from core.fetcher import FETCH_HTTP, fetch_page, check_page, mark_page_processed
 
 logger = logging.getLogger(__name__)
 
@@ -19,24 +21,45 @@ SOURCE_NAME = "GrETUA"
 AGENDA_URL = "https://www.viralagenda.com/pt/p/GrETUA.oficial"
 BASE_URL = "https://www.viralagenda.com"
 
+# A lista vem no HTML estático (data-date-start / data-url), não precisa de Chrome
+FETCH_MODE = FETCH_HTTP
+
+# Só a ul#viral-events é convertida em árvore (resto da página é descartado)
+PARSE_ONLY = container_strainer('ul', element_id='viral-events')
+
+# Tempo máximo (s) à espera que a lista estabilize
+READY_TIMEOUT = 4
+
 def scrape(driver, db):
     logger.info(f"Starting scraper: {SOURCE_NAME}")
     events_count = 0
 
     try:
         logger.info(f"Navigating to: {AGENDA_URL}")
-        driver.get(AGENDA_URL)
-
-        # Esperar que a lista de eventos carregue
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, "viral-events"))
-            )
-            time.sleep(2)
-        except Exception:
-            logger.warning("Timeout waiting for #viral-events container.")
+        if driver is None:
+            page = fetch_page(AGENDA_URL)
+        else:
+            with timed('navigate'):
+                driver.get(AGENDA_URL)
+
+            # Esperar que a lista de eventos carregue
+            with timed('wait'):
+                try:
+                    WebDriverWait(driver, 15).until(
+                        EC.presence_of_element_located((By.ID, "viral-events"))
+                    )
+                    wait_for_ready(driver, '#viral-events > li', timeout=READY_TIMEOUT)
+                except Exception:
+                    logger.warning("Timeout waiting for #viral-events container.")
+
+            page = check_page(AGENDA_URL, driver.page_source)
+
+        # Agenda igual à da última execução: nada para processar
+        if not page.changed:
+            logger.info(f"{SOURCE_NAME}: agenda unchanged since last run, skipping")
+            return 0
 
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        soup = parse_html(page.text, PARSE_ONLY)
 
         # Encontrar a lista principal (ul)
         ul_list = soup.find('ul', id='viral-events')
@@ -45,39 +68,19 @@ def scrape(driver, db):
             logger.error("Container '#viral-events' não encontrado!")
             return 0
 
-        # Encontrar todos os items da lista (eventos, anúncios, passados)
-        # Usamos recursive=False para garantir que são filhos diretos
-        list_items = ul_list.find_all('li', recursive=False)
-        logger.info(f"Found {len(list_items)} list items to process")
-
-        for item in list_items:
-            # 1. STOP CONDITION: Verificar se chegámos aos eventos passados
-            classes = item.get('class', [])
-            if 'viral-event-past' in classes:
-                logger.info("🛑 Marcador 'Passados' encontrado. A parar o scraper.")
-                break
-
-            # 2. Ignorar Anúncios ou itens que não sejam eventos
-            if 'viral-item-ads' in classes or 'viral-event' not in classes:
-                continue
-
-            try:
-                event_data = _parse_event_item(item)
-
-                # Validação: Só guardamos se tiver Título e Data
-                if event_data and event_data['title'] and event_data['start_date']:
-                    logger.debug(f"Processando: {event_data['title']} -> {event_data['start_date']}")
-                    db.upsert_event(event_data)
-                    events_count += 1
-                else:
-                    if event_data:
-                        logger.debug(f"Ignorado (dados incompletos): {event_data.get('title')}")
-
-            except Exception as e:
-                logger.error(f"Error parsing item: {e}")
-                continue
-
-        logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
+        # Itens -> parse -> escrita em lotes numa thread à parte
+        metrics = run_pipeline(iter_items(ul_list), db, parse=parse_item, name=SOURCE_NAME)
+        events_count = metrics['events']
+
+        # Só marca a página como processada se não houve falhas (senão volta a ser lida)
+        if is_complete(metrics):
+            mark_page_processed(page)
+            logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
+        else:
+            logger.warning(
+                f"{SOURCE_NAME}: scraped {events_count} events with "
+                f"{metrics['stages']['parse']['errors']} parse errors; page will be parsed again next run"
+            )
         return events_count
 
     except Exception as e:
@@ -85,6 +88,40 @@ def scrape(driver, db):
         return events_count
 
 
+def iter_items(ul_list):
+    """Yield the upcoming li.viral-event items, stopping at the 'Passados' marker."""
+    # Encontrar todos os items da lista (eventos, anúncios, passados)
+    # Usamos recursive=False para garantir que são filhos diretos
+    list_items = ul_list.find_all('li', recursive=False)
+    logger.info(f"Found {len(list_items)} list items to process")
+
+    for item in list_items:
+        # 1. STOP CONDITION: Verificar se chegámos aos eventos passados
+        classes = item.get('class', [])
+        if 'viral-event-past' in classes:
+            logger.info("🛑 Marcador 'Passados' encontrado. A parar o scraper.")
+            return
+
+        # 2. Ignorar Anúncios ou itens que não sejam eventos
+        if 'viral-item-ads' in classes or 'viral-event' not in classes:
+            continue
+
+        yield item
+
+
+def parse_item(item) -> Optional[Dict]:
+    """Parse an item, dropping it when it has no title or date."""
+    event_data = _parse_event_item(item)
+
+    # Validação: Só guardamos se tiver Título e Data
+    if event_data and event_data['title'] and event_data['start_date']:
+        logger.debug(f"Processando: {event_data['title']} -> {event_data['start_date']}")
+        return event_data
+    if event_data:
+        logger.debug(f"Ignorado (dados incompletos): {event_data.get('title')}")
+    return None
+
+
 def _parse_event_item(item) -> Optional[Dict]:
     """
     Parses a single 'li.viral-event' item.
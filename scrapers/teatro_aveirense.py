@@ -4,14 +4,16 @@ Scrapes events from Teatro Aveirense parsing the specific HTML structure of /pro
 """
 
 import logging
-import re
-import time
-from datetime import datetime
-from typing import Dict, Optional, Tuple
-from bs4 import BeautifulSoup
+from typing import Dict, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from core.dates import parse_date_range
+from core.driver import wait_for_ready
+from core.instrumentation import timed
+from core.parsing import container_strainer, parse_html
+from core.pipeline import is_complete, run_pipeline
+from core.fetcher import FETCH_HTTP, fetch_page, check_page, mark_page_processed
 
 logger = logging.getLogger(__name__)
 
@@ -19,13 +21,14 @@ SOURCE_NAME = "Teatro Aveirense"
 AGENDA_URL = "https://www.teatroaveirense.pt/pt/programacao/"
 BASE_URL = "https://www.teatroaveirense.pt"
 
-# Mapeamento de meses PT -> Int
-MONTHS = {
-    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'abril': 4, 'maio': 5, 'junho': 6,
-    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
-    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
-    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
-}
+# Os div.programa_item vêm no HTML estático, não precisa de Chrome
+FETCH_MODE = FETCH_HTTP
+
+# Só os div.programa_item são convertidos em árvore (resto da página é descartado)
+PARSE_ONLY = container_strainer('div', css_class='programa_item')
+
+# Tempo máximo (s) à espera que a lista e as imagens estabilizem
+READY_TIMEOUT = 4
 
 def scrape(driver, db):
     logger.info(f"Starting scraper: {SOURCE_NAME}")
@@ -33,34 +36,44 @@ def scrape(driver, db):
 
     try:
         logger.info(f"Navigating to: {AGENDA_URL}")
-        driver.get(AGENDA_URL)
-
-        # Esperar pelo container principal dos itens
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "programa_item"))
+        if driver is None:
+            page = fetch_page(AGENDA_URL)
+        else:
+            with timed('navigate'):
+                driver.get(AGENDA_URL)
+
+            # Esperar pelo container principal dos itens
+            with timed('wait'):
+                try:
+                    WebDriverWait(driver, 15).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "programa_item"))
+                    )
+                    wait_for_ready(driver, 'div.programa_item', timeout=READY_TIMEOUT, lazy_image_attrs=('src',))
+                except Exception:
+                    logger.warning("Timeout waiting for .programa_item. Page structure might have changed.")
+
+            page = check_page(AGENDA_URL, driver.page_source)
+
+        # Agenda igual à da última execução: nada para processar
+        if not page.changed:
+            logger.info(f"{SOURCE_NAME}: agenda unchanged since last run, skipping")
+            return 0
+
+        soup = parse_html(page.text, PARSE_ONLY)
+
+        # Itens -> parse -> escrita em lotes numa thread à parte
+        metrics = run_pipeline(iter_items(soup), db, parse=parse_item, name=SOURCE_NAME)
+        events_count = metrics['events']
+
+        # Só marca a página como processada se não houve falhas (senão volta a ser lida)
+        if is_complete(metrics):
+            mark_page_processed(page)
+            logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
+        else:
+            logger.warning(
+                f"{SOURCE_NAME}: scraped {events_count} events with "
+                f"{metrics['stages']['parse']['errors']} parse errors; page will be parsed again next run"
             )
-            time.sleep(2) # Wait for images/dynamic content
-        except Exception:
-            logger.warning("Timeout waiting for .programa_item. Page structure might have changed.")
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        # O HTML mostra que os itens são 'div.programa_item'
-        event_items = soup.find_all('div', class_='programa_item')
-        logger.info(f"Found {len(event_items)} event items")
-
-        for item in event_items:
-            try:
-                event_data = _parse_event_item(item)
-                if event_data and event_data['title']:
-                    db.upsert_event(event_data)
-                    events_count += 1
-            except Exception as e:
-                logger.error(f"Error parsing item: {e}")
-                continue
-
-        logger.info(f"{SOURCE_NAME}: Successfully scraped {events_count} events")
         return events_count
 
     except Exception as e:
@@ -68,6 +81,22 @@ def scrape(driver, db):
         return events_count
 
 
+def iter_items(soup):
+    """Yield the div.programa_item elements of the agenda page."""
+    # O HTML mostra que os itens são 'div.programa_item'
+    event_items = soup.find_all('div', class_='programa_item')
+    logger.info(f"Found {len(event_items)} event items")
+    yield from event_items
+
+
+def parse_item(item) -> Optional[Dict]:
+    """Parse an item, dropping it when it has no title."""
+    event_data = _parse_event_item(item)
+    if event_data and event_data['title']:
+        return event_data
+    return None
+
+
 def _parse_event_item(item) -> Optional[Dict]:
     """
     Parses a specific .programa_item div based on the provided HTML structure.
@@ -93,7 +122,7 @@ def _parse_event_item(item) -> Optional[Dict]:
 
     if date_div:
         date_text = date_div.get_text(strip=True)
-        start_date, end_date = _parse_portuguese_date_string(date_text)
+        start_date, end_date = parse_date_range(date_text)
 
     # 3. LINK
     link_tag = item.find('a', href=True)
@@ -134,46 +163,3 @@ def _parse_event_item(item) -> Optional[Dict]:
         'all_day': True  # <--- NOVA FLAG IMPORTANTE
     }
 
-
-def _parse_portuguese_date_string(date_text: str) -> Tuple[Optional[str], Optional[str]]:
-    """
-    Parses complex Portuguese date strings into YYYY-MM-DD formats (No time).
-    """
-    if not date_text:
-        return None, None
-
-    date_text = date_text.lower().replace('.', ' ').strip()
-    current_year = datetime.now().year
-
-    # Helper para converter "02 fevereiro" em string YYYY-MM-DD
-    def make_date(day, month_name, year):
-        month = MONTHS.get(month_name)
-        if not month:
-            return None
-        # ALTERAÇÃO AQUI: strftime('%Y-%m-%d') remove as horas T00:00:00
-        return datetime(year, month, int(day)).strftime('%Y-%m-%d')
-
-    try:
-        # Caso 1: Intervalo meses diferentes "26 abril - 03 maio"
-        match_diff_months = re.match(r'(\d+)\s+([a-zç]+)\s*-\s*(\d+)\s+([a-zç]+)', date_text)
-        if match_diff_months:
-            d1, m1, d2, m2 = match_diff_months.groups()
-            return make_date(d1, m1, current_year), make_date(d2, m2, current_year)
-
-        # Caso 2: Intervalo mesmo mês "13-14 março"
-        match_same_month = re.match(r'(\d+)\s*-\s*(\d+)\s+([a-zç]+)', date_text)
-        if match_same_month:
-            d1, d2, m1 = match_same_month.groups()
-            return make_date(d1, m1, current_year), make_date(d2, m1, current_year)
-
-        # Caso 3: Data única "02 fevereiro"
-        match_single = re.match(r'(\d+)\s+([a-zç]+)', date_text)
-        if match_single:
-            d1, m1 = match_single.groups()
-            iso_date = make_date(d1, m1, current_year)
-            return iso_date, None
-
-    except Exception as e:
-        logger.warning(f"Date parsing failed for '{date_text}': {e}")
-
-    return None, None
\ No newline at end of file
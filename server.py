@@ -1,38 +1,454 @@
 #!/usr/bin/env python3
 """
 Simple HTTP server for testing the frontend locally.
-Serves the current directory with CORS enabled.
+Serves the current directory with CORS enabled, strong ETags (304 on
+If-None-Match), gzip/brotli for text assets and a per-path cache policy.
+Also exposes a read-only JSON API over events.db (/api/events, /api/search,
+/api/tags, /api/stats).
 """
 
+import argparse
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import io
+import json
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from core.database import DB_PATH, ReadOnlyDatabasePool
+
+try:
+    import brotli
+except ImportError:  # Optional: brotli is only used if installed
+    brotli = None
 
 PORT = 8000
 
+# Extensions worth compressing
+COMPRESSIBLE = {'.json', '.js', '.css', '.html', '.svg', '.txt'}
+
+# Cache-Control per URL path prefix (first match wins)
+CACHE_POLICIES = [
+    ('/data/', 'no-cache'),                  # Always revalidate (cheap 304 via ETag)
+    ('/static/', 'public, max-age=3600'),
+    ('', 'no-cache'),
+]
+
+# Page size limits for /api/events and /api/search
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 500
+
+# API responses kept in memory (least recently used are dropped first)
+API_CACHE_SIZE = 256
+
+# Precompressed siblings (e.g. events.json.br) take precedence over on-the-fly compression
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+
+def fresh_precompressed(path, suffix):
+    """Return the precompressed sibling of a file if it exists and is up to date."""
+    candidate = path + suffix
+    try:
+        if os.path.getmtime(candidate) >= os.path.getmtime(path):
+            return candidate
+    except OSError:
+        pass
+    return None
+
+
+class FileCache:
+    """In-memory cache of file bodies, ETags and compressed variants."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """
+        Return the cache entry for a file, reloading it if it changed on disk.
+
+        Args:
+            path: Filesystem path of a regular file
+
+        Returns:
+            Dictionary with 'body', 'etag', 'mtime' and 'variants' (encoding -> bytes)
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['key'] == key:
+                return entry
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        entry = {
+            'key': key,
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'mtime': stat.st_mtime,
+            'variants': {},
+        }
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def variant(self, path, entry, encoding):
+        """
+        Return the body of a file in the given content encoding.
+
+        Args:
+            path: Filesystem path of the file
+            entry: Entry returned by get()
+            encoding: 'br', 'gzip' or None for identity
+
+        Returns:
+            Encoded bytes
+        """
+        if encoding is None:
+            return entry['body']
+
+        with self._lock:
+            body = entry['variants'].get(encoding)
+        if body is not None:
+            return body
+
+        precompressed = fresh_precompressed(path, dict(PRECOMPRESSED)[encoding])
+        if precompressed:
+            with open(precompressed, 'rb') as f:
+                body = f.read()
+        elif encoding == 'br':
+            body = brotli.compress(entry['body'])
+        else:
+            body = gzip.compress(entry['body'], compresslevel=6, mtime=0)
+
+        with self._lock:
+            entry['variants'][encoding] = body
+        return body
+
+
+FILE_CACHE = FileCache()
+
+
+class ApiCache:
+    """
+    In-memory LRU cache of API responses, dropped whenever events.db changes
+    on disk. Bounded to max_size entries, since every cursor/query/date
+    combination is a key of its own.
+    """
+
+    def __init__(self, db_path, max_size=API_CACHE_SIZE):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self._responses = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def version(self):
+        """
+        Current version of the database, as (mtime, size) of events.db and
+        of its WAL file (commits land in the WAL until a checkpoint).
+        """
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        try:
+            wal = os.stat(f"{self.db_path}-wal")
+            wal_version = (wal.st_mtime_ns, wal.st_size)
+        except OSError:
+            wal_version = None
+        return (stat.st_mtime_ns, stat.st_size, wal_version)
+
+    def get(self, key, version):
+        """Return the cached response for key if it was built from this version."""
+        with self._lock:
+            if version != self._version:
+                self._responses.clear()
+                self._version = version
+            response = self._responses.get(key)
+            if response is not None:
+                self._responses.move_to_end(key)
+            return response
+
+    def put(self, key, version, response):
+        """Store a response built from the given database version."""
+        with self._lock:
+            if version == self._version:
+                self._responses[key] = response
+                self._responses.move_to_end(key)
+                if len(self._responses) > self.max_size:
+                    self._responses.popitem(last=False)
+
+
 class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive, so repeated requests reuse the connection
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+    quiet = False
+    db_pool = None
+    api_cache = None
+
     def end_headers(self):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
         return super().end_headers()
 
+    def send_head(self):
+        """Serve regular files from FILE_CACHE; defer everything else to the base class."""
+        url_path = self.path.split('?', 1)[0].split('#', 1)[0]
+        if url_path.startswith('/api/'):
+            return self.send_api()
+
+        path = self.translate_path(self.path)
+
+        if os.path.isdir(path) and url_path.endswith('/'):
+            index = os.path.join(path, 'index.html')
+            if os.path.isfile(index):
+                path = index
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        try:
+            entry = FILE_CACHE.get(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        encoding = self._choose_encoding(path)
+        etag = f'"{entry["etag"]}-{encoding}"' if encoding else f'"{entry["etag"]}"'
+        cache_control = self._cache_policy(url_path)
+
+        if self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        body = FILE_CACHE.variant(path, entry, encoding)
+
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(entry['mtime'], usegmt=True))
+        self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_api(self):
+        """Answer an /api/ request from the response cache or the database."""
+        parts = urlsplit(self.path)
+        version = self.api_cache.version()
+        if version is None:
+            return self._send_json(503, {'error': 'Database not available'})
+
+        response = self.api_cache.get(self.path, version)
+        if response is None:
+            try:
+                status, payload = self._api_payload(parts.path, parse_qs(parts.query))
+            except ValueError as e:
+                status, payload = 400, {'error': str(e)}
+            except sqlite3.Error as e:
+                status, payload = 503, {'error': f'Database error: {e}'}
+
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            response = (status, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            if status == 200:
+                self.api_cache.put(self.path, version, response)
+
+        status, body, etag = response
+        if status == 200 and self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        return self._send_json(status, body=body, etag=etag)
+
+    def _api_payload(self, url_path, query):
+        """
+        Build the response for an API route.
+
+        Returns:
+            (status, payload) tuple
+
+        Raises:
+            ValueError: If a query parameter is invalid
+        """
+        def param(name):
+            values = query.get(name)
+            return values[-1] if values else None
+
+        if url_path == '/api/stats':
+            with self.db_pool.connection() as db:
+                return 200, db.get_stats()
+
+        if url_path == '/api/events':
+            from_date = _parse_day(param('from'), 'from')
+            to_date = _parse_day(param('to'), 'to')
+            limit = _parse_limit(param('limit'))
+
+            with self.db_pool.connection() as db:
+                page = db.query_events(
+                    from_date=from_date, to_date=to_date, source=param('source'),
+                    tag=param('tag'), limit=limit, cursor=param('cursor')
+                )
+            return 200, page
+
+        if url_path == '/api/search':
+            text = param('q')
+            if not text or not text.strip():
+                raise ValueError("Missing search query (q)")
+            from_date = _parse_day(param('from'), 'from')
+            to_date = _parse_day(param('to'), 'to')
+            limit = _parse_limit(param('limit'))
+
+            with self.db_pool.connection() as db:
+                results = db.search(
+                    text, from_date=from_date, to_date=to_date, source=param('source'), limit=limit
+                )
+            return 200, results
+
+        if url_path == '/api/tags':
+            from_date = _parse_day(param('from'), 'from')
+            to_date = _parse_day(param('to'), 'to')
+
+            with self.db_pool.connection() as db:
+                counts = db.get_tag_counts(from_date=from_date, to_date=to_date, source=param('source'))
+            return 200, {'tags': counts}
+
+        return 404, {'error': f'Unknown API endpoint: {url_path}'}
+
+    def _send_json(self, status, payload=None, body=None, etag=None):
+        """Send a JSON response and return its body for copyfile()."""
+        if body is None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def _choose_encoding(self, path):
+        """Pick 'br' or 'gzip' if the client accepts it and the file type is compressible."""
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE:
+            return None
+
+        accepted = {
+            token.split(';', 1)[0].strip().lower()
+            for token in self.headers.get('Accept-Encoding', '').split(',')
+        }
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            if encoding == 'br' and brotli is None and not fresh_precompressed(path, suffix):
+                continue
+            return encoding
+        return None
+
+    def _etag_matches(self, etag):
+        """Check the request's If-None-Match header against an ETag."""
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        candidates = [tag.strip() for tag in header.split(',')]
+        return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+    @staticmethod
+    def _cache_policy(url_path):
+        """Return the Cache-Control value configured for a URL path."""
+        for prefix, policy in CACHE_POLICIES:
+            if url_path.startswith(prefix):
+                return policy
+        return 'no-cache'
+
     def log_message(self, format, *args):
         """Custom log format"""
-        print(f"[{self.log_date_time_string()}] {format % args}")
+        if not self.quiet:
+            print(f"[{self.log_date_time_string()}] {format % args}")
+
+
+def _parse_limit(value):
+    """Validate an optional limit query parameter, clamped to 1..API_MAX_LIMIT."""
+    try:
+        limit = API_DEFAULT_LIMIT if value is None else int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value}")
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def _parse_day(value, name):
+    """Validate an optional YYYY-MM-DD query parameter."""
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid {name} date (expected YYYY-MM-DD): {value}")
+
+
+class ThreadedServer(http.server.ThreadingHTTPServer):
+    # The default backlog of 5 makes concurrent clients wait on SYN retries
+    request_queue_size = 64
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Local server for the events frontend")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--bind', default='')
+    parser.add_argument(
+        '--single-thread', action='store_true',
+        help="Handle one request at a time (old behaviour)"
+    )
+    parser.add_argument('--quiet', action='store_true', help="Don't log every request")
+    parser.add_argument('--db', default=str(DB_PATH), help="SQLite database served by /api/")
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
+    args = parse_args()
+    db_path = Path(args.db).resolve()
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-    with socketserver.TCPServer(("", PORT), CORSRequestHandler) as httpd:
+    CORSRequestHandler.quiet = args.quiet
+    CORSRequestHandler.db_pool = ReadOnlyDatabasePool(db_path)
+    CORSRequestHandler.api_cache = ApiCache(db_path)
+    server_class = http.server.HTTPServer if args.single_thread else ThreadedServer
+
+    with server_class((args.bind, args.port), CORSRequestHandler) as httpd:
         print("=" * 60)
-        print(f"🚀 Server running at http://localhost:{PORT}")
+        print(f"🚀 Server running at http://localhost:{args.port}")
         print("=" * 60)
-        print(f"\n📂 Serving directory: {os.getcwd()}\n")
+        print(f"\n📂 Serving directory: {os.getcwd()}")
+        print(f"🧵 Mode: {'single-threaded' if args.single_thread else 'threaded'}\n")
+        print(f"🔎 API: http://localhost:{args.port}/api/events  /api/search?q=  /api/tags  /api/stats\n")
         print("Press Ctrl+C to stop the server\n")
 
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n\n👋 Server stopped")
+        finally:
+            CORSRequestHandler.db_pool.close()
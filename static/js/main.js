@@ -39,7 +39,109 @@ document.addEventListener('DOMContentLoaded', function () {
 
     calendar.render();
 
-    // Carregar os dados
+    // Carregar os dados: shards mensais (manifest) se existirem, senão o events.json completo
+    fetch(SHARDS_URL + 'manifest.json')
+        .then(response => {
+            if (!response.ok) throw new Error("Manifest indisponível");
+            return response.json();
+        })
+        .then(manifest => loadMonthShards(calendar, manifest))
+        .catch(() => loadFullExport(calendar));
+});
+
+// Pasta com os ficheiros por mês (data/events/YYYY-MM.json) e o manifest.json
+const SHARDS_URL = 'data/events/';
+
+// Shard com os eventos sem data (data/events/undated.json)
+const UNDATED_SHARD = 'undated';
+
+// Fonte escolhida nos filtros (null = Todos)
+let activeSource = null;
+
+/**
+ * Converte um evento do JSON para o formato do FullCalendar
+ */
+function toCalendarEvent(event) {
+    return {
+        id: event.id,
+        title: event.title,
+        start: event.start_date,
+        end: event.end_date,
+        url_original: event.url, // Guardamos o url original numa prop extra
+        image_url: event.image_url,
+        location: event.location,
+        source: event.source,
+        // Atribuir cor baseada na fonte
+        classNames: ['evt-' + normalizeSource(event.source)],
+        display: activeSource && event.source !== activeSource ? 'none' : 'auto'
+    };
+}
+
+/**
+ * Carrega apenas os meses visíveis (e pré-carrega os vizinhos) a partir dos shards
+ */
+function loadMonthShards(calendar, manifest) {
+    const loadingSpinner = document.getElementById('loadingSpinner');
+    const cache = {}; // "YYYY-MM" -> Promise com os eventos do mês
+
+    function loadMonth(month) {
+        const entry = manifest.months[month];
+        if (!entry) return Promise.resolve([]);
+        if (!cache[month]) {
+            cache[month] = fetch(SHARDS_URL + entry.file)
+                .then(response => {
+                    if (!response.ok) throw new Error("Erro ao ler " + entry.file);
+                    return response.json();
+                })
+                .then(data => data.events)
+                .catch(error => {
+                    delete cache[month]; // Permitir nova tentativa
+                    throw error;
+                });
+        }
+        return cache[month];
+    }
+
+    calendar.addEventSource(function (info, successCallback, failureCallback) {
+        const months = monthsBetween(info.start, info.end);
+        // Eventos de vários meses vêm em todos os shards que abrangem: juntar por id.
+        // O shard "undated" (sem data) é carregado sempre, como no events.json completo.
+        Promise.all(months.concat(UNDATED_SHARD).map(loadMonth))
+            .then(lists => {
+                loadingSpinner.style.display = 'none';
+                const events = new Map(lists.flat().map(event => [event.id, event]));
+                successCallback([...events.values()].map(toCalendarEvent));
+
+                // Pré-carregar o mês anterior e o seguinte
+                loadMonth(shiftMonth(months[0], -1)).catch(() => {});
+                loadMonth(shiftMonth(months[months.length - 1], 1)).catch(() => {});
+            })
+            .catch(error => {
+                console.error('Erro:', error);
+                loadingSpinner.innerHTML = `<div class="text-danger"><i class="bi bi-exclamation-triangle"></i> Erro ao carregar eventos.</div>`;
+                failureCallback(error);
+            });
+    });
+
+    generateFilters(manifest.sources.map(source => ({ source: source })), calendar);
+
+    // Estatísticas a partir do manifest (sem descarregar todos os meses)
+    const now = new Date();
+    const currentMonth = monthKey(now);
+    document.getElementById('totalEvents').textContent = manifest.total_events;
+    document.getElementById('thisMonth').textContent =
+        manifest.months[currentMonth] ? manifest.months[currentMonth].count : 0;
+    updateNextEvent(manifest.next_event_date ? [new Date(manifest.next_event_date)] : []);
+
+    updateLastUpdated(manifest.last_updated);
+}
+
+/**
+ * Carrega todos os eventos de uma vez a partir do events.json
+ */
+function loadFullExport(calendar) {
+    const loadingSpinner = document.getElementById('loadingSpinner');
+
     fetch('data/events.json')
         .then(response => {
             if (!response.ok) throw new Error("Erro ao ler JSON");
@@ -54,18 +156,7 @@ document.addEventListener('DOMContentLoaded', function () {
             const lastUpdated = data.last_updated; // Get the actual timestamp
 
             // 2. Preparar os eventos para o FullCalendar
-            const events = eventsData.map(event => ({
-                id: event.id,
-                title: event.title,
-                start: event.start_date,
-                end: event.end_date,
-                url_original: event.url, // Guardamos o url original numa prop extra
-                image_url: event.image_url,
-                location: event.location,
-                source: event.source,
-                // Atribuir cor baseada na fonte
-                classNames: ['evt-' + normalizeSource(event.source)]
-            }));
+            const events = eventsData.map(toCalendarEvent);
 
             // 3. Adicionar ao calendário
             calendar.addEventSource(events);
@@ -77,46 +168,80 @@ document.addEventListener('DOMContentLoaded', function () {
             updateStats(events);
 
             // 6. Atualizar data de "Last Update" no header
-            if (lastUpdated) {
-                const updateDate = new Date(lastUpdated);
-                const now = new Date();
-
-                // Calculate difference in days
-                const diffTime = now - updateDate;
-                const diffDays = Math.floor(diffTime / (1000 * 60 * 60 * 24));
-
-                let updateText;
-                if (diffDays === 0) {
-                    // Today - just show "Atualizado hoje"
-                    updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado hoje`;
-                } else if (diffDays === 1) {
-                    // Yesterday
-                    updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado ontem`;
-                } else if (diffDays <= 2) {
-                    // 2 days ago - still compact
-                    updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado há ${diffDays} dias`;
-                } else {
-                    // Older than 2 days - show full date but more compact
-                    const dateStr = updateDate.toLocaleDateString('pt-PT', {
-                        day: '2-digit',
-                        month: '2-digit'
-                    });
-                    updateText = `<i class="bi bi-clock-history"></i> ${dateStr}`;
-                }
-
-                document.getElementById('lastUpdate').innerHTML = updateText;
-            } else {
-                // Fallback if no timestamp in data
-                document.getElementById('lastUpdate').innerHTML =
-                    `<i class="bi bi-check-circle-fill text-success"></i> Atualizado`;
-            }
-
+            updateLastUpdated(lastUpdated);
         })
         .catch(error => {
             console.error('Erro:', error);
             loadingSpinner.innerHTML = `<div class="text-danger"><i class="bi bi-exclamation-triangle"></i> Erro ao carregar eventos.</div>`;
         });
-});
+}
+
+/**
+ * Chave "YYYY-MM" de uma data (hora local)
+ */
+function monthKey(date) {
+    return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
+}
+
+/**
+ * Soma (ou subtrai) meses a uma chave "YYYY-MM"
+ */
+function shiftMonth(key, delta) {
+    const [year, month] = key.split('-').map(Number);
+    return monthKey(new Date(year, month - 1 + delta, 1));
+}
+
+/**
+ * Lista de meses "YYYY-MM" abrangidos pelo intervalo [start, end[
+ */
+function monthsBetween(start, end) {
+    const months = [];
+    const cursor = new Date(start.getFullYear(), start.getMonth(), 1);
+    while (cursor < end) {
+        months.push(monthKey(cursor));
+        cursor.setMonth(cursor.getMonth() + 1);
+    }
+    return months;
+}
+
+/**
+ * Atualiza a data de "Last Update" no header
+ */
+function updateLastUpdated(lastUpdated) {
+    if (lastUpdated) {
+        const updateDate = new Date(lastUpdated);
+        const now = new Date();
+
+        // Calculate difference in days
+        const diffTime = now - updateDate;
+        const diffDays = Math.floor(diffTime / (1000 * 60 * 60 * 24));
+
+        let updateText;
+        if (diffDays === 0) {
+            // Today - just show "Atualizado hoje"
+            updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado hoje`;
+        } else if (diffDays === 1) {
+            // Yesterday
+            updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado ontem`;
+        } else if (diffDays <= 2) {
+            // 2 days ago - still compact
+            updateText = `<i class="bi bi-check-circle-fill text-success"></i> Atualizado há ${diffDays} dias`;
+        } else {
+            // Older than 2 days - show full date but more compact
+            const dateStr = updateDate.toLocaleDateString('pt-PT', {
+                day: '2-digit',
+                month: '2-digit'
+            });
+            updateText = `<i class="bi bi-clock-history"></i> ${dateStr}`;
+        }
+
+        document.getElementById('lastUpdate').innerHTML = updateText;
+    } else {
+        // Fallback if no timestamp in data
+        document.getElementById('lastUpdate').innerHTML =
+            `<i class="bi bi-check-circle-fill text-success"></i> Atualizado`;
+    }
+}
 
 /**
  * Função para normalizar o nome da fonte para usar no CSS
@@ -170,7 +295,8 @@ function generateFilters(events, calendar) {
             document.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
             btn.classList.add('active');
 
-            // Filtrar calendário
+            // Filtrar calendário (e os meses que ainda vão ser carregados)
+            activeSource = source;
             const allEvents = calendar.getEvents();
             allEvents.forEach(evt => {
                 // Compara a fonte do evento com o texto do botão
@@ -192,6 +318,7 @@ function generateFilters(events, calendar) {
             btnAll.classList.add('active');
 
             // Mostrar todos
+            activeSource = null;
             calendar.getEvents().forEach(evt => evt.setProp('display', 'auto'));
         };
     }
@@ -213,9 +340,17 @@ function updateStats(events) {
     document.getElementById('thisMonth').textContent = thisMonthEvents.length;
 
     // 3. Próximo Evento (dias que faltam)
+    updateNextEvent(events.map(e => new Date(e.start)));
+}
+
+/**
+ * Mostra quantos dias faltam para o próximo evento
+ */
+function updateNextEvent(dates) {
+    const now = new Date();
+
     // Filtrar apenas eventos futuros
-    const futureEvents = events
-        .map(e => new Date(e.start))
+    const futureEvents = dates
         .filter(d => d >= now)
         .sort((a, b) => a - b); // Ordenar do mais próximo para o mais distante
 
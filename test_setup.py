@@ -3,6 +3,8 @@ Quick test script to validate the scraper setup without running Selenium.
 """
 
 import sys
+import json
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -11,6 +13,22 @@ from core.database import EventDatabase
 from datetime import datetime, timedelta
 
 
+def _event(i, source='Test Source', days=None, **overrides):
+    """Test event number i, starting `days` days from today (default: i days)."""
+    event = {
+        'title': f'Evento {i}',
+        'start_date': (datetime.now() + timedelta(days=i if days is None else days)).strftime('%Y-%m-%d'),
+        'end_date': None,
+        'location': 'Aveiro',
+        'url': f'https://example.com/events/{i}',
+        'image_url': None,
+        'source': source,
+        'tags': []
+    }
+    event.update(overrides)
+    return event
+
+
 def test_database():
     """Test database functionality."""
     print("Testing Database...")
@@ -75,6 +93,784 @@ def test_database():
     print("\n✅ Database tests passed!")
 
 
+def test_batch_upserts():
+    """Test bulk upserts and the batch() context manager."""
+    print("\nTesting Batch Upserts...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "batch.db")
+
+        counts = db.upsert_events(_event(i) for i in range(5))
+        assert counts == {'inserted': 5, 'updated': 0, 'unchanged': 0}, counts
+
+        counts = db.upsert_events([_event(0, title='Renomeado'), _event(1), _event(9)])
+        assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 1}, counts
+        print(f"✓ upsert_events counts: {counts}")
+
+        # A failing batch is rolled back as a whole
+        try:
+            with db.batch():
+                db.upsert_event(_event(20))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert db.get_stats()['total_events'] == 6
+
+        with db.batch():
+            for i in range(30, 33):
+                db.upsert_event(_event(i))
+        assert db.get_stats()['total_events'] == 9
+        print("✓ batch() commits once and rolls back on error")
+
+        db.close()
+
+
+def test_future_events_use_indexes():
+    """Test that future-event queries stay index range scans as history grows."""
+    print("\nTesting Query Plans...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "plans.db")
+
+        # A few years of history, mostly in the past
+        db.upsert_events(_event(i, f'Source {i % 3}', -(i % 1500)) for i in range(3000))
+        db.upsert_event(_event(3000, 'Source 0', 0, title='Hoje'))
+        db.conn.execute("ANALYZE")
+
+        # Date-only events of today are not dropped by the comparison
+        future_events = db.get_future_events()
+        assert any(e['title'] == 'Hoje' for e in future_events)
+
+        # Aggregate stats match the materialized list
+        stats = db.get_stats()
+        assert stats['future_events'] == len(future_events)
+        assert stats['future_by_source']['Source 1'] == len(db.get_future_events('Source 1'))
+        assert stats['total_events'] == 3001
+        assert stats['last_date'] == datetime.now().strftime('%Y-%m-%d')
+
+        for source in (None, 'Source 1'):
+            for sql, params in db._future_events_queries(source):
+                plan = [row['detail'] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+                assert any(d.startswith('SEARCH events USING') for d in plan), plan
+                assert not any(d.startswith('SCAN') or 'TEMP B-TREE' in d for d in plan), plan
+                print(f"✓ {plan}")
+
+        db.close()
+
+
+def test_streaming_export():
+    """Test that the streamed export matches the events and leaves no temp files."""
+    print("\nTesting JSON Export...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "export.db")
+        db.upsert_events(_event(i, title=f'Espetáculo {i}', tags=['Teatro']) for i in range(50))
+        events = db.get_future_events()
+
+        for compact in (False, True):
+            output_path = Path(tmp) / "events.json"
+            db.export_to_json(output_path=output_path, compact=compact)
+            data = json.loads(output_path.read_text(encoding='utf-8'))
+            assert data['events'] == events
+            assert data['total_events'] == len(events)
+            assert ('\n' in output_path.read_text(encoding='utf-8')) != compact
+
+        # No temp files left behind (the -wal/-shm files belong to the open WAL database)
+        leftovers = sorted(p.name for p in Path(tmp).iterdir() if not p.name.endswith(('-wal', '-shm')))
+        assert leftovers == ["events.json", "export.db"]
+        print(f"✓ Streamed {len(events)} events (indented and compact)")
+
+        # Re-scraping the same events doesn't rewrite the file
+        assert db.last_export_changed
+        before = output_path.read_text(encoding='utf-8')
+        db.upsert_events(dict(e, tags=['Teatro']) for e in events)
+        db.export_to_json(output_path=output_path, compact=True)
+        assert not db.last_export_changed
+        assert output_path.read_text(encoding='utf-8') == before
+
+        db.upsert_event(dict(events[0], title='Novo título', tags=['Teatro']))
+        db.export_to_json(output_path=output_path, compact=True)
+        assert db.last_export_changed
+        print("✓ Export skipped when events are unchanged")
+
+        db.close()
+
+
+def test_month_shards():
+    """Test per-month shard export and its manifest."""
+    print("\nTesting Month Shards...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "shards.db")
+        db.upsert_events(_event(i, days=i * 7) for i in range(20))
+        # A run over three months and an event without a date
+        start = datetime.now() + timedelta(days=10)
+        end = start + timedelta(days=70)
+        db.upsert_events([
+            _event(20, days=10, end_date=end.strftime('%Y-%m-%d')),
+            _event(21, start_date=None),
+        ])
+        shards_dir = Path(tmp) / "events"
+        manifest = db.export_shards(output_dir=shards_dir)
+
+        shard_events = {}
+        for month, entry in manifest['months'].items():
+            data = json.loads((shards_dir / entry['file']).read_text(encoding='utf-8'))
+            assert data['month'] == month and len(data['events']) == entry['count']
+            for e in data['events']:
+                if e['start_date']:
+                    assert e['start_date'][:7] <= month <= (e['end_date'] or e['start_date'])[:7]
+                else:
+                    assert month == 'undated'
+                shard_events.setdefault(e['id'], e)
+        assert list(manifest['months'])[0] == 'undated'
+        assert list(manifest['months'])[1:] == sorted(list(manifest['months'])[1:])
+        assert sorted(shard_events.values(), key=lambda e: e['id']) == \
+            sorted(db.get_future_events(), key=lambda e: e['id'])
+        assert manifest['total_events'] == 22
+
+        run_id = db.generate_event_id('https://example.com/events/20')
+        run_months = [month for month, entry in manifest['months'].items()
+                      if any(e['id'] == run_id for e in json.loads(
+                          (shards_dir / entry['file']).read_text(encoding='utf-8'))['events'])]
+        assert run_months == EventDatabase._months_between(start.strftime('%Y-%m'), end.strftime('%Y-%m'))
+        assert len(run_months) >= 3
+
+        # Unchanged data keeps the manifest as it was
+        manifest_text = (shards_dir / "manifest.json").read_text(encoding='utf-8')
+        assert db.export_shards(output_dir=shards_dir) == manifest
+        assert (shards_dir / "manifest.json").read_text(encoding='utf-8') == manifest_text
+        print(f"✓ {len(manifest['months'])} month shards exported")
+
+        db.close()
+
+
+def test_query_events_pagination():
+    """Test keyset pagination and filters of query_events on a read-only connection."""
+    print("\nTesting Event Queries...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "query.db"
+        db = EventDatabase(db_path=db_path)
+        db.upsert_events(
+            _event(i, 'Cinema' if i % 2 else 'Teatro', i // 3, tags=['Cinema'] if i % 2 else ['Teatro', 'Drama'])
+            for i in range(45)
+        )
+        db.close()
+
+        reader = EventDatabase(db_path=db_path, read_only=True)
+        seen, cursor = [], None
+        while True:
+            page = reader.query_events(limit=10, cursor=cursor)
+            seen.extend(page['events'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        assert len(seen) == 45 and len({e['id'] for e in seen}) == 45
+        assert [e['start_date'] for e in seen] == sorted(e['start_date'] for e in seen)
+
+        to_date = (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')
+        window = reader.query_events(to_date=to_date, source='Teatro', limit=100)['events']
+        assert window and all(e['source'] == 'Teatro' and e['start_date'] <= to_date for e in window)
+        assert len(reader.query_events(tag='Drama', limit=100)['events']) == 23
+        print(f"✓ Paged through {len(seen)} events, filters by date/source/tag")
+
+        reader.close()
+
+
+def test_date_parsing():
+    """Test the shared date parser, including year rollover."""
+    print("\nTesting Date Parsing...")
+
+    from datetime import date
+    from core.dates import parse_date, parse_date_range, parse_date_ranges
+
+    today = date(2026, 12, 10)
+    assert parse_date_range("02 fevereiro", today) == ("2027-02-02", None)
+    assert parse_date_range("13-14 Março", today) == ("2027-03-13", "2027-03-14")
+    assert parse_date_range("26 abril - 03 maio", date(2026, 4, 1)) == ("2026-04-26", "2026-05-03")
+    assert parse_date_range("20 dez. - 05 jan.", today) == ("2026-12-20", "2027-01-05")
+    assert parse_date("22 – jan", today) == "2027-01-22"
+    assert parse_date("22 – jan", date(2026, 1, 5)) == "2026-01-22"
+    assert parse_date("15 dezembro", date(2027, 1, 5)) == "2026-12-15"
+    # Upcoming events months ahead are never moved into the past
+    assert parse_date("28 dez", date(2026, 2, 1)) == "2026-12-28"
+    assert parse_date("14 – nov", date(2026, 2, 1)) == "2026-11-14"
+    assert parse_date("10 janeiro", date(2026, 2, 1)) == "2026-01-10"
+    assert parse_date("20 dezembro", date(2026, 2, 1)) == "2026-12-20"
+    assert parse_date("29 fev", date(2026, 2, 1)) == "2028-02-29"
+    # Ranges are dated from their end: runs already on keep this year's dates
+    assert parse_date_range("01 setembro - 30 dezembro", date(2026, 11, 15)) == ("2026-09-01", "2026-12-30")
+    assert parse_date_range("14 setembro - 02 outubro", date(2026, 10, 17)) == ("2026-09-14", "2026-10-02")
+    assert parse_date_range("20-28 fevereiro", date(2026, 2, 25)) == ("2026-02-20", "2026-02-28")
+    assert parse_date_range("10 março - 29 fevereiro", date(2028, 3, 15)) == ("2027-03-10", "2028-02-29")
+    assert parse_date_range("29 fevereiro - 10 março", date(2028, 3, 1)) == ("2028-02-29", "2028-03-10")
+    assert parse_date("31 fevereiro", today) is None
+    assert parse_date("brevemente", today) is None
+    assert parse_date_ranges(["02 fev", "", "02  FEV"], today) == [
+        ("2027-02-02", None), (None, None), ("2027-02-02", None)
+    ]
+    print("✓ Single days, ranges and December/January rollover parsed")
+
+
+def test_pipeline():
+    """Test the streaming pipeline and the legacy scraper shim."""
+    print("\nTesting Pipeline...")
+
+    from core.pipeline import is_complete, run_legacy_scraper, run_pipeline
+
+    def raw_items(n):
+        for i in range(n):
+            yield {'n': i, 'day': (datetime.now() + timedelta(days=i % 30)).strftime('%Y-%m-%d')}
+
+    def parse(raw):
+        if raw['n'] % 10 == 0:
+            return None
+        if raw['n'] == 7:
+            raise ValueError("broken item")
+        return _event(raw['n'], 'Pipeline', title=f'  Evento   {raw["n"]} ', start_date=raw['day'],
+                      tags=['Pipeline', '', 'Pipeline'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "pipeline.db")
+
+        metrics = run_pipeline(raw_items(500), db, parse=parse, workers=3, batch_size=64, queue_size=32)
+        assert metrics['events'] == 449 and metrics['dropped'] == 51
+        assert metrics['stages']['parse']['errors'] == 1
+        assert metrics['written']['inserted'] == 449
+        assert metrics['queue']['max_depth'] <= 32
+        stored = db.get_future_events(source='Pipeline')
+        assert len(stored) == 449
+        assert stored[0]['title'].startswith('Evento ') and stored[0]['tags'] == ['Pipeline']
+        # Parse errors or an empty page keep the page from being marked processed
+        assert not is_complete(metrics)
+        assert not is_complete(run_pipeline(iter([]), db, parse=parse))
+        assert is_complete(run_pipeline(raw_items(5), db, parse=lambda raw: parse(dict(raw, n=raw['n'] + 11))))
+
+        def legacy_scrape(driver, writer):
+            with writer.batch():
+                for i in range(5):
+                    writer.upsert_event(dict(parse({'n': 1001 + i, 'day': stored[0]['start_date']})))
+            return 5
+
+        assert run_legacy_scraper(legacy_scrape, None, db) == 5
+        assert db.get_stats()['total_events'] == 454
+        print(f"✓ Pipeline stored {metrics['events']} events "
+              f"(store {metrics['stages']['store']['per_second']}/s), legacy shim wrote 5")
+
+        db.close()
+
+
+def test_instrumentation():
+    """Test phase timers, the profiler and the run report."""
+    print("\nTesting Instrumentation...")
+
+    from core.instrumentation import ScraperProfiler, start_phases, stop_phases, timed, write_run_report
+
+    with timed('ignored'):
+        pass
+
+    start_phases()
+    for _ in range(3):
+        with timed('parse_html'):
+            sum(range(1000))
+    phases = stop_phases().as_dict()
+    assert list(phases) == ['parse_html'] and phases['parse_html']['count'] == 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with ScraperProfiler('demo', output_dir=Path(tmp)) as profiler:
+            [str(i) for i in range(10000)]
+        assert profiler.summary['peak_kib'] > 0
+        assert Path(profiler.summary['prof']).exists() and Path(profiler.summary['text']).exists()
+
+        report_path = write_run_report({'scrapers': [{'phases': phases}]}, Path(tmp) / "run_report.json")
+        assert json.loads(report_path.read_text())['scrapers'][0]['phases']['parse_html']['count'] == 3
+    print(f"✓ Phase timers, profiler (peak {profiler.summary['peak_kib']} KiB) and run report")
+
+
+def test_run_history():
+    """Test the runs.db history and its trend summary."""
+    print("\nTesting Run History...")
+
+    from core.history import RunHistory
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = RunHistory(db_path=Path(tmp) / "runs.db")
+
+        for i in range(8):
+            slow = i >= 5
+            history.record_run({
+                'started_at': f'2026-03-0{i + 1}T08:00:00',
+                'finished_at': f'2026-03-0{i + 1}T08:01:00',
+                'elapsed': 60.0 + i,
+                'exit_code': 0,
+                'workers': 3,
+                'export_seconds': 0.5,
+                'events_changed': True,
+                'scrapers': [
+                    {
+                        'scraper': 'scrapers.aveiroon', 'mode': 'browser', 'events': 40,
+                        'bytes': 200000, 'elapsed': 20.0 if slow else 10.0 + i * 0.1, 'error': None,
+                        'pipeline': {'written': {'inserted': 1, 'updated': 2, 'unchanged': 37}},
+                        'breakdown': {'navigate': 15.0 if slow else 5.0, 'wait': 3.0},
+                    },
+                    {
+                        'scraper': 'scrapers.gretua', 'mode': 'http', 'events': 20,
+                        'bytes': 50000, 'elapsed': 1.0, 'error': 'boom' if i == 2 else None,
+                        'pipeline': None, 'breakdown': {'fetch': 0.8},
+                    },
+                ],
+            })
+
+        runs = history.get_run_history(last=5)
+        assert len(runs) == 5 and runs[0]['started_at'] < runs[-1]['started_at']
+        assert runs[-1]['scrapers'][0]['phases']['navigate'] == 15.0
+        assert runs[-1]['scrapers'][0]['inserted'] == 1 and runs[-1]['events'] == 60
+
+        trends = history.get_run_trends(last=8)
+        aveiroon = trends['scrapers']['scrapers.aveiroon']
+        gretua = trends['scrapers']['scrapers.gretua']
+        assert trends['runs'] == 8 and aveiroon['p95'] == 20.0 and aveiroon['regression']
+        assert not gretua['regression'] and gretua['failures'] == 1
+        assert aveiroon['phases_p50']['wait'] == 3.0
+        print(f"✓ Recorded 8 runs, aveiroon flagged at {aveiroon['ratio']}x its earlier median")
+
+        history.close()
+        # events.db (tracked by git) holds no run history
+        db = EventDatabase(db_path=Path(tmp) / "events.db")
+        tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert 'runs' not in tables and 'scraper_runs' not in tables
+        db.close()
+
+
+def test_wal_concurrent_readers():
+    """Test that readers are never blocked by an in-progress scrape (WAL)."""
+    print("\nTesting WAL Concurrent Readers...")
+
+    import threading
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "wal.db"
+        writer = EventDatabase(db_path=db_path)
+        assert writer.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        writer.upsert_events(_event(i, 'WAL', i % 60) for i in range(100))
+
+        reads = []
+        stop = threading.Event()
+
+        def read_loop():
+            # Separate process-like reader: its own read-only connection
+            reader = EventDatabase(db_path=db_path, read_only=True)
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    count = reader.get_stats()['total_events']
+                    reads.append((count, time.perf_counter() - started))
+            finally:
+                reader.close()
+
+        thread = threading.Thread(target=read_loop)
+        thread.start()
+        try:
+            # A long "scrape": one open write transaction with thousands of rows
+            with writer.batch():
+                for i in range(100, 5100):
+                    writer.upsert_event(_event(i, 'WAL', i % 60))
+                time.sleep(0.2)
+                with writer.reader() as reader:
+                    assert reader.get_stats()['total_events'] == 100
+        finally:
+            stop.set()
+            thread.join()
+
+        assert reads and all(count in (100, 5100) for count, _ in reads)
+        assert max(seconds for _, seconds in reads) < 1.0
+        assert writer.checkpoint()['busy'] == 0
+        assert (Path(f"{db_path}-wal").stat().st_size) == 0
+        with writer.reader() as reader:
+            assert reader.get_stats()['total_events'] == 5100
+        print(f"✓ {len(reads)} reads during a 5000-row write transaction, "
+              f"slowest {max(seconds for _, seconds in reads) * 1000:.1f} ms")
+
+        writer.close()
+
+
+def test_change_tracking():
+    """Test that unchanged events aren't rewritten and the run diff."""
+    print("\nTesting Change Tracking...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "diff.db")
+        db.upsert_events(_event(i, 'Diff') for i in range(4))
+        db.upsert_events(_event(i, 'Vazio') for i in (20, 21))
+        db.cursor.execute("SELECT first_seen, last_changed, scraped_at FROM events WHERE url = ?",
+                          ('https://example.com/events/0',))
+        first_seen, last_changed, scraped_at = db.cursor.fetchone()
+        assert first_seen == last_changed == scraped_at
+
+        db.start_run_diff()
+        written_before = dict(db.conn.execute("SELECT url, scraped_at FROM events").fetchall())
+        counts = db.upsert_events([
+            _event(0, 'Diff'),
+            _event(1, 'Diff', tags=['Teatro', 'Infantil']),
+            _event(2, 'Diff', title='Evento 2 (novo horário)'),
+            _event(9, 'Diff'),
+        ])
+        assert counts == {'inserted': 1, 'updated': 2, 'unchanged': 1}, counts
+        # Only the new event and the two changed ones were written
+        written = {url for url, scraped_at in db.conn.execute("SELECT url, scraped_at FROM events")
+                   if written_before.get(url) != scraped_at}
+        assert written == {f'https://example.com/events/{i}' for i in (1, 2, 9)}, written
+        assert not db.upsert_event(_event(0, 'Diff')) and db.upsert_event(_event(0, 'Diff', location='GrETUA'))
+        # Writes that are rolled back don't show up in the diff
+        try:
+            with db.batch():
+                db.upsert_event(_event(30, 'Diff'))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+
+        diff = db.run_diff()['Diff']
+        assert [e['url'] for e in diff['added']] == ['https://example.com/events/9']
+        assert {e['title']: e['fields'] for e in diff['changed']} == {
+            'Evento 1': ['tags'], 'Evento 2 (novo horário)': ['title'], 'Evento 0': ['location'],
+        }
+        assert [e['url'] for e in diff['vanished']] == ['https://example.com/events/3']
+        assert diff['unchanged'] == 2
+
+        # A source that ran but upserted nothing has all its future events vanished
+        diffs = db.run_diff(sources=['Diff', 'Vazio', 'Nova'])
+        assert 'Vazio' not in db.run_diff()
+        assert [e['url'] for e in diffs['Vazio']['vanished']] == [f'https://example.com/events/{i}' for i in (20, 21)]
+        assert diffs['Nova'] == {'added': [], 'changed': [], 'vanished': [], 'unchanged': 0}
+
+        db.cursor.execute("SELECT tags, first_seen, last_changed FROM events WHERE url = ?",
+                          ('https://example.com/events/1',))
+        row = db.cursor.fetchone()
+        assert json.loads(row['tags']) == ['Teatro', 'Infantil'] and row['first_seen'] <= row['last_changed']
+        print("✓ 1 added, 3 changed, 1 vanished; empty sources reported, unchanged events not rewritten")
+
+        db.close()
+
+
+def test_duplicate_linking():
+    """Test cross-source duplicate detection and the collapsed export."""
+    print("\nTesting Duplicate Linking...")
+
+    from core.dedup import find_duplicates, similarity, title_tokens
+
+    assert title_tokens('Território IX - Estúdios Victor Córdon') >= title_tokens('TERRITORIO IX')
+    assert similarity(title_tokens('Concerto de Natal'), title_tokens('Concerto de Ano Novo')) < 0.8
+
+    day = (datetime.now() + timedelta(days=3)).strftime('%Y-%m-%d')
+    rows = [
+        ('Território IX - Estúdios Victor Córdon', 'Teatro Aveirense', day),
+        ('Território IX', 'AveiroOn', day),
+        ('Território IX', 'AveiroOn', (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')),
+        ('Festival END - Encontros de Novas Dramaturgias', 'Teatro Aveirense', day),
+        ('Espalhar Fel - Festival END', 'Teatro Aveirense', day),
+        ('Festival END', 'AveiroOn', day),
+        ('Concerto de Natal', 'GrETUA', day),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "dedup.db")
+        db.upsert_events(
+            _event(i, source, title=title, start_date=start) for i, (title, source, start) in enumerate(rows)
+        )
+        db.conn.execute("UPDATE events SET first_seen = '2026-01-01T08:00:00' WHERE source = 'Teatro Aveirense'")
+
+        stats = db.link_duplicates()
+        assert stats['duplicates'] == 2 and stats['clusters'] == 2, stats
+        db.cursor.execute("""
+            SELECT d.title, c.title AS canonical FROM events d JOIN events c ON c.id = d.canonical_id
+        """)
+        links = {row['title']: row['canonical'] for row in db.cursor.fetchall()}
+        # Teatro Aveirense's rows were seen first, so they are the canonical events
+        assert links == {
+            'Território IX': 'Território IX - Estúdios Victor Córdon',
+            'Festival END': 'Festival END - Encontros de Novas Dramaturgias',
+        }, links
+
+        # The export and the unfiltered queries collapse duplicates; per-source ones don't
+        exported = db.get_future_events()
+        assert len(exported) == 5 and db.get_stats()['future_events'] == 5
+        assert db.get_stats()['duplicates'] == 2
+        assert len(db.get_future_events('AveiroOn')) == 3
+        assert len(db.query_events(to_date=day)['events']) == 4
+
+        # Linking is idempotent and follows title changes
+        assert db.link_duplicates()['updated'] == 0
+        db.upsert_event(_event(1, 'AveiroOn', title='Outra Peça', start_date=day))
+        assert db.link_duplicates()['duplicates'] == 1
+        # A daily run only reads the events from its date on
+        assert db.link_duplicates(from_date=(datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d'))['events'] == 1
+
+        # Blocking keeps comparisons far below all pairs
+        events = [
+            {'id': str(i), 'title': f'Evento {i} Sessão', 'source': f'S{i % 3}', 'start_day': f'2026-01-{i % 28 + 1:02d}'}
+            for i in range(2000)
+        ]
+        _, stats = find_duplicates(events)
+        assert stats['comparisons'] < 2000 * 1999 // 2 // 100
+        print(f"✓ 2 duplicates linked and collapsed, {stats['comparisons']} comparisons for 2000 events")
+
+        db.close()
+
+
+def test_full_text_search():
+    """Test the FTS5 index, its sync triggers and search()."""
+    print("\nTesting Full-Text Search...")
+
+    def day(offset):
+        return (datetime.now() + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+    events = [
+        ('Concerto de Natal', 'Teatro Aveirense', ['Música'], day(5)),
+        ('Música no Hospital', 'Aveiro', ['Infantil'], day(40)),
+        ('Teatro Praga: Hamlet', 'GrETUA', ['Teatro'], day(10)),
+        ('Concerto Antigo', 'Teatro Aveirense', ['Música'], day(-400)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(db_path=Path(tmp) / "search.db")
+        db.upsert_events(
+            _event(i, 'Search', title=title, location=location, tags=tags, start_date=start)
+            for i, (title, location, tags, start) in enumerate(events)
+        )
+
+        def titles(query, **kwargs):
+            return [e['title'] for e in db.search(query, **kwargs)['events']]
+
+        # Prefix matching, accents folded, tags indexed as values (not JSON escapes)
+        assert titles('conc') == ['Concerto de Natal']
+        assert titles('musica') == ['Música no Hospital', 'Concerto de Natal'], titles('musica')
+        assert titles('teat aveir') == ['Concerto de Natal']
+        # Title matches rank above location/tag matches
+        assert titles('teatro')[0] == 'Teatro Praga: Hamlet'
+        # Date window (default: today onwards), and FTS5 syntax is not interpreted
+        assert sorted(titles('concerto', from_date=day(-500))) == ['Concerto Antigo', 'Concerto de Natal']
+        assert titles('concerto', from_date=day(-500), to_date=day(-1)) == ['Concerto Antigo']
+        assert titles('música', to_date=day(30)) == ['Concerto de Natal']
+        assert titles('"natal" OR (hamlet') == [] and titles('  ') == []
+
+        # Triggers keep the index in sync with updates and deletes
+        db.upsert_event(
+            _event(0, 'Search', 5, title='Concerto de Ano Novo', location='Teatro Aveirense', tags=['Música'])
+        )
+        assert titles('natal') == [] and titles('novo') == ['Concerto de Ano Novo']
+        db.conn.execute("DELETE FROM events WHERE url = ?", ('https://example.com/events/2',))
+        assert titles('hamlet') == []
+        db.conn.execute("INSERT INTO events_fts (events_fts) VALUES ('integrity-check')")
+
+        # An existing database without the index gets it built on open
+        db.conn.execute("DROP TABLE events_fts")
+        db.conn.commit()
+        db.close()
+        db = EventDatabase(db_path=Path(tmp) / "search.db")
+        assert titles('novo') == ['Concerto de Ano Novo']
+        print("✓ Prefix, accent-folded and ranked search in sync with events")
+
+        db.close()
+
+
+def test_tag_tables():
+    """Test the normalized tags / event_tags tables and the tag queries."""
+    print("\nTesting Tag Tables...")
+
+    def day(offset):
+        return (datetime.now() + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "tags.db"
+        db = EventDatabase(db_path=db_path)
+        db.upsert_events([
+            _event(0, days=2, tags=['Música', 'Jazz']),
+            _event(1, days=20, tags=['Música', 'Música']),
+            _event(2, 'Outra', 5, tags=['Teatro']),
+            _event(3, days=-30, tags=['Música']),
+        ])
+
+        assert [e['title'] for e in db.get_events_by_tag('Música')] == ['Evento 0', 'Evento 1']
+        assert [e['title'] for e in db.get_events_by_tag('Música', from_date=day(-60), to_date=day(10))] == \
+            ['Evento 3', 'Evento 0']
+        assert db.get_events_by_tag('Música')[0]['tags'] == ['Música', 'Jazz']
+        assert db.get_tag_counts() == {'Música': 2, 'Jazz': 1, 'Teatro': 1}
+        assert db.get_tag_counts(source='Outra') == {'Teatro': 1}
+        assert [e['title'] for e in db.query_events(tag='Jazz')['events']] == ['Evento 0']
+
+        # Triggers follow tag changes and deletes
+        db.upsert_event(_event(0, days=2, tags=['Jazz']))
+        db.conn.execute("DELETE FROM events WHERE url = ?", ('https://example.com/events/2',))
+        assert db.get_tag_counts() == {'Jazz': 1, 'Música': 1}
+
+        # Existing databases are migrated from the JSON column on open
+        db.conn.execute("DROP TABLE event_tags")
+        db.conn.execute("DELETE FROM tags")
+        db.conn.commit()
+        db.close()
+        db = EventDatabase(db_path=db_path)
+        assert db.get_tag_counts(from_date=day(-60)) == {'Música': 2, 'Jazz': 1}
+        print(f"✓ Tag facets: {db.get_tag_counts(from_date=day(-60))}")
+
+        db.close()
+
+
+def test_fixture_parsing():
+    """Test each scraper's strained parse of its saved agenda page (benchmarks/fixtures/)."""
+    print("\nTesting Fixture Parsing...")
+
+    from core.parsing import parse_html
+    from scrapers import aveiroon, gretua, teatro_aveirense
+
+    fixtures = Path(__file__).parent / "benchmarks" / "fixtures"
+    # Scraper, fixture, how scrape() finds the container in the strained tree, upcoming events
+    cases = [
+        (teatro_aveirense, 'teatro_aveirense.html', lambda soup: soup, 40),
+        (aveiroon, 'aveiroon.html', lambda soup: soup.select_one('.display-today-events.intro'), 60),
+        (gretua, 'gretua.html', lambda soup: soup.find('ul', id='viral-events'), 28),
+    ]
+    for module, fixture, find_container, expected in cases:
+        soup = parse_html((fixtures / fixture).read_text(encoding='utf-8'), module.PARSE_ONLY)
+        container = find_container(soup)
+        assert container is not None, fixture
+        events = [e for e in map(module.parse_item, module.iter_items(container)) if e]
+        assert len(events) == expected, (fixture, len(events))
+        assert all(e['source'] == module.SOURCE_NAME and e['url'].startswith('http') for e in events)
+        print(f"✓ {fixture}: {len(events)} events")
+
+
+def test_offline_scrapers():
+    """Test each scraper's scrape() on its fixture, through a real page cache and fake driver."""
+    print("\nTesting Offline Scrapers...")
+
+    from benchmarks.bench_scrapers import FIXTURES_DIR, SOURCES, FakeDatabase, FakeDriver, offline
+    from core.driver import block_resources
+    from core.fetcher import FETCH_BROWSER, PageCache, reset_unchanged_pages, unchanged_pages
+
+    # First event of each fixture (dates depend on today, so only their format is checked)
+    samples = {
+        'teatro_aveirense': ('Exposição orquestra verão teatro', 'Teatro Aveirense',
+                             'https://www.teatroaveirense.pt/pt/programacao/exposição-orquestra-verão-teatro-0/'),
+        'aveiroon': ('Sal teatro', 'Aveiro', 'https://aveiroon.cm-aveiro.pt/eventos/sal-teatro-0/'),
+        'gretua': ('Oficina mar banda', 'GrETUA',
+                   'https://www.viralagenda.com/pt/events/100000/oficina-mar-banda-0'),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PageCache(cache_dir=Path(tmp))
+        for key, spec in SOURCES.items():
+            module = spec['module']
+            html = (FIXTURES_DIR / spec['fixture']).read_text(encoding='utf-8')
+
+            def run():
+                db = FakeDatabase()
+                driver = FakeDriver(html) if module.FETCH_MODE == FETCH_BROWSER else None
+                with offline(module, html):
+                    # The page cache is real (HTTP pages are checked as if fetched)
+                    module.fetch_page = lambda url, *args, **kwargs: cache.check(url, html)
+                    module.check_page = cache.check
+                    module.mark_page_processed = cache.mark_processed
+                    count = module.scrape(driver, db)
+                return count, db.events, driver
+
+            count, events, driver = run()
+            assert count == len(events) == spec['events'], (key, count, len(events))
+            title, location, url = samples[key]
+            event = events[0]
+            assert (event['title'], event['location'], event['url']) == (title, location, url), event
+            assert event['source'] == module.SOURCE_NAME and module.SOURCE_NAME in event['tags']
+            for e in events:
+                datetime.strptime(e['start_date'][:10], '%Y-%m-%d')
+                assert e['title'] and e['image_url'].startswith('http'), e
+            if driver:
+                assert driver.current_url == module.AGENDA_URL
+
+            # Marked processed, so the same page is skipped on the next run
+            reset_unchanged_pages()
+            count, events, _ = run()
+            assert count == 0 and events == [] and unchanged_pages() == 1, key
+            print(f"✓ {key}: {spec['events']} events, unchanged page skipped")
+
+    class CdpDriver:
+        def __init__(self, fail=False):
+            self.commands = []
+            self.fail = fail
+
+        def execute_cdp_cmd(self, cmd, params):
+            if self.fail:
+                raise RuntimeError("CDP unavailable")
+            self.commands.append((cmd, params))
+
+    driver = CdpDriver()
+    assert block_resources(driver, allow=('*.svg',))
+    blocked = driver.commands[-1][1]['urls']
+    assert {'*.png', '*.png?*', '*googletagmanager.com*'} <= set(blocked)
+    assert '*.svg' not in blocked and '*.svg?*' not in blocked
+    assert not block_resources(CdpDriver(fail=True))
+    print(f"✓ block_resources: {len(blocked)} patterns blocked, allow list honoured")
+
+
+def test_api_server():
+    """Test /api/events pagination and bad cursors through the HTTP server."""
+    print("\nTesting API Server...")
+
+    import base64
+    import threading
+    import urllib.error
+    import urllib.request
+    from core.database import ReadOnlyDatabasePool
+    from server import ApiCache, CORSRequestHandler, ThreadedServer
+
+    def get(path):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}") as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "api.db"
+        db = EventDatabase(db_path=db_path)
+        db.upsert_events(_event(i, days=i // 4) for i in range(25))
+        db.close()
+
+        class Handler(CORSRequestHandler):
+            quiet = True
+            db_pool = ReadOnlyDatabasePool(db_path)
+            api_cache = ApiCache(db_path)
+
+        server = ThreadedServer(('127.0.0.1', 0), Handler)
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            seen, cursor = [], None
+            while True:
+                status, page = get(f"/api/events?limit=10{f'&cursor={cursor}' if cursor else ''}")
+                assert status == 200, page
+                seen.extend(e['id'] for e in page['events'])
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            assert len(seen) == 25 and len(set(seen)) == 25
+
+            def encode(value):
+                return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+            for bad in ('not-a-cursor', encode([1, 2, 3]), encode([None, None, 5]),
+                        encode(['2026-01-01', '2026-02-01', 5]), encode(['2026-01-01', '2026-01-01', True])):
+                status, payload = get(f"/api/events?cursor={bad}")
+                assert status == 400 and 'Invalid cursor' in payload['error'], (bad, status, payload)
+            assert get("/api/events?limit=abc")[0] == 400
+            print(f"✓ Paged through {len(seen)} events over HTTP, bad cursors answered with 400")
+        finally:
+            server.shutdown()
+            server.server_close()
+            Handler.db_pool.close()
+
+
 def test_imports():
     """Test that all modules can be imported."""
     print("\nTesting Imports...")
@@ -115,6 +911,23 @@ if __name__ == "__main__":
     # Run tests
     if test_imports():
         test_database()
+        test_batch_upserts()
+        test_future_events_use_indexes()
+        test_streaming_export()
+        test_month_shards()
+        test_query_events_pagination()
+        test_date_parsing()
+        test_pipeline()
+        test_instrumentation()
+        test_run_history()
+        test_wal_concurrent_readers()
+        test_change_tracking()
+        test_duplicate_linking()
+        test_full_text_search()
+        test_tag_tables()
+        test_fixture_parsing()
+        test_offline_scrapers()
+        test_api_server()
         print("\n" + "=" * 60)
         print("✅ ALL TESTS PASSED!")
         print("=" * 60)